@@ -0,0 +1,474 @@
+import argparse
+import csv
+import json
+import os
+import random
+import signal
+import statistics
+import sys
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from urllib.parse import parse_qs, urlsplit
+
+from storage.movie_index import MovieIndex
+from storage.storage_factory import create_storage
+from storage.streaming import iter_file_rows, parse_movie_row
+
+
+# Query string parameters of each endpoint, as name: (type, default)
+QUERY_PARAMETERS = {
+    "/movies/search": {"q": (str, "")},
+    "/movies/title": {"t": (str, "")},
+    "/movies/filter": {"min_rating": (float, None), "start_year": (int, None), "end_year": (int, None)},
+}
+
+
+class MovieSnapshot:
+    """
+    An immutable in-memory copy of the movies in a storage file,
+    tagged with the version of the file it was loaded from.
+    """
+
+    def __init__(self, movies, version):
+        """
+        Initialize the snapshot and pre-render the responses that only
+        depend on the data.
+
+        :param movies: Dictionary of movies as returned by IStorage.list_movies().
+        :param version: Version string of the storage file the movies were read from.
+        """
+        self.movies = movies
+        self.version = version
+        self.etag = f'"{version}"'
+        self.movie_items = list(movies.items())
+        self.title_index = MovieIndex(movies)
+        self.list_body = encode_json(movies_to_list(self.movie_items))
+        self.stats_body = encode_json(calculate_stats(movies))
+
+
+class SnapshotHolder:
+    """
+    Keep the current snapshot of a storage and reload it when the
+    underlying file changes. The file is only read, never repaired: if a
+    new version cannot be read, the last good snapshot is kept.
+    """
+
+    def __init__(self, storage, reload_interval=1.0):
+        """
+        Initialize the holder and load the first snapshot.
+
+        :param storage: An instance of a storage class that implements IStorage.
+        :param reload_interval: Minimum number of seconds between two checks of the file.
+        :raises OSError: If the storage file cannot be read.
+        :raises ValueError: If the storage file contains an invalid movie.
+        """
+        self._storage = storage
+        self._reload_interval = reload_interval
+        self._lock = threading.Lock()
+        self._last_check = time.monotonic()
+        # Version of the file that failed to load, so it is not read again and again
+        self._failed_version = None
+        self._snapshot = self._load()
+
+
+    def _file_version(self):
+        """
+        Build a version string from the modification time and size of the storage file.
+
+        :return: Version string, or None if the file does not exist.
+        """
+        try:
+            stat_result = os.stat(self._storage.file_path)
+        except FileNotFoundError:
+            return None
+        return f"{stat_result.st_mtime_ns:x}-{stat_result.st_size:x}"
+
+
+    def _load(self):
+        """
+        Read the storage file into a new snapshot. The file version is checked
+        before and after reading so a file replaced mid-read is read again.
+        The rows are read directly instead of through IStorage.list_movies(),
+        which writes default data over a file it cannot read.
+
+        :return: The new MovieSnapshot.
+        :raises OSError: If the storage file cannot be read.
+        :raises ValueError: If the storage file contains an invalid movie.
+        """
+        while True:
+            version_before = self._file_version()
+            movies = {}
+            for row in iter_file_rows(self._storage.file_path):
+                movie_id, details = parse_movie_row(row)
+                movies[movie_id] = details
+            version_after = self._file_version()
+            if version_before == version_after:
+                return MovieSnapshot(movies, version_after)
+
+
+    def get(self):
+        """
+        Return the current snapshot, reloading it first if the storage
+        file changed since it was loaded.
+
+        :return: The current MovieSnapshot.
+        """
+        now = time.monotonic()
+        if now - self._last_check < self._reload_interval:
+            return self._snapshot
+
+        with self._lock:
+            if now - self._last_check >= self._reload_interval:
+                self._last_check = now
+                version = self._file_version()
+                if version not in (self._snapshot.version, self._failed_version):
+                    try:
+                        self._snapshot = self._load()
+                        self._failed_version = None
+                    except (OSError, ValueError, csv.Error) as e:
+                        self._failed_version = version
+                        print(f"Keeping the previous movies, {self._storage.file_path} "
+                              f"could not be read: {e}", file=sys.stderr)
+        return self._snapshot
+
+
+class MovieRequestHandler(BaseHTTPRequestHandler):
+    """
+    Serve read-only JSON queries over the current movie snapshot.
+    """
+
+    protocol_version = "HTTP/1.1"
+    server_version = "MovieAPI/1.0"
+
+    def do_GET(self):
+        """
+        Dispatch a GET request to the matching endpoint.
+        """
+        url = urlsplit(self.path)
+        query = parse_qs(url.query)
+        snapshot = self.server.snapshots.get()
+
+        if url.path == "/movies/random":
+            self._send_random(snapshot)
+            return
+
+        routes = {
+            "/movies": self._list_body,
+            "/movies/search": self._search_body,
+            "/movies/title": self._title_body,
+            "/movies/filter": self._filter_body,
+            "/movies/stats": self._stats_body,
+        }
+        if url.path not in routes:
+            self._send_json(404, encode_json({"error": f"Unknown endpoint {url.path}"}))
+            return
+
+        # Invalid parameters get a 400 even if the client has a matching ETag
+        try:
+            params = parse_query_params(query, QUERY_PARAMETERS.get(url.path, {}))
+        except ValueError as e:
+            self._send_json(400, encode_json({"error": str(e)}))
+            return
+
+        # Every other endpoint is fully determined by the URL and the data version
+        if self._etag_matches(snapshot.etag):
+            self._send_not_modified(snapshot.etag)
+            return
+
+        body = routes[url.path](snapshot, params)
+        self._send_json(200, body, etag=snapshot.etag)
+
+
+    def _list_body(self, snapshot, params):
+        """
+        Return the pre-rendered list of all movies.
+        """
+        return snapshot.list_body
+
+
+    def _stats_body(self, snapshot, params):
+        """
+        Return the pre-rendered movie statistics.
+        """
+        return snapshot.stats_body
+
+
+    def _search_body(self, snapshot, params):
+        """
+        Return the movies whose title contains the 'q' parameter, case-insensitive.
+        """
+        search_term = params["q"].lower()
+        matching_items = [
+            (movie_id, details) for movie_id, details in snapshot.movie_items
+            if search_term in details["title"].lower()
+        ]
+        return encode_json(movies_to_list(matching_items))
+
+
+    def _title_body(self, snapshot, params):
+        """
+        Return the movies whose title equals the 't' parameter, ignoring case, accents and spacing.
+        """
+        title = params["t"]
+        matching_items = [(movie_id, snapshot.movies[movie_id]) for movie_id in snapshot.title_index.find(title)]
+        return encode_json(movies_to_list(matching_items))
+
+
+    def _filter_body(self, snapshot, params):
+        """
+        Return the movies matching the 'min_rating', 'start_year' and 'end_year' parameters.
+        """
+        minimum_rating = params["min_rating"]
+        start_year = params["start_year"]
+        end_year = params["end_year"]
+
+        filtered_items = [
+            (movie_id, details) for movie_id, details in snapshot.movie_items
+            if (minimum_rating is None or details["rating"] >= minimum_rating) and
+               (start_year is None or details["year"] >= start_year) and
+               (end_year is None or details["year"] <= end_year)
+        ]
+        return encode_json(movies_to_list(filtered_items))
+
+
+    def _send_random(self, snapshot):
+        """
+        Send one random movie. This response is never cached.
+        """
+        if not snapshot.movie_items:
+            self._send_json(404, encode_json({"error": "No movies available"}))
+            return
+        body = encode_json(movies_to_list([random.choice(snapshot.movie_items)])[0])
+        self._send_json(200, body, extra_headers={"Cache-Control": "no-store"})
+
+
+    def _etag_matches(self, etag):
+        """
+        Check whether the If-None-Match header of the request matches the given ETag.
+        """
+        header = self.headers.get("If-None-Match")
+        if not header:
+            return False
+        for candidate in header.split(","):
+            candidate = candidate.strip()
+            if candidate.startswith("W/"):
+                candidate = candidate[2:]
+            if candidate == "*" or candidate == etag:
+                return True
+        return False
+
+
+    def _send_not_modified(self, etag):
+        """
+        Send an empty 304 response.
+        """
+        self.send_response(304)
+        self.send_header("ETag", etag)
+        self.send_header("Content-Length", "0")
+        self.end_headers()
+
+
+    def _send_json(self, status, body, etag=None, extra_headers=None):
+        """
+        Send a JSON response with the given status and encoded body.
+        """
+        self.send_response(status)
+        self.send_header("Content-Type", "application/json")
+        self.send_header("Content-Length", str(len(body)))
+        if etag is not None:
+            self.send_header("ETag", etag)
+        for name, value in (extra_headers or {}).items():
+            self.send_header(name, value)
+        self.end_headers()
+        self.wfile.write(body)
+
+
+    def log_message(self, format, *args):
+        """
+        Silence the per-request log lines, they slow down the server under load.
+        """
+        pass
+
+
+def encode_json(data):
+    """
+    Encode data as a compact UTF-8 JSON body.
+
+    :param data: JSON-serializable data.
+    :return: Encoded bytes.
+    """
+    return json.dumps(data, separators=(",", ":")).encode("utf-8")
+
+
+def movies_to_list(movie_items):
+    """
+    Convert (movie_id, details) pairs into a list of movie dictionaries.
+
+    :param movie_items: Iterable of (movie_id, details) tuples.
+    :return: List of dictionaries with id, imdb_id, title, year, rating and poster.
+    """
+    return [
+        {"id": movie_id, "imdb_id": details.get("imdb_id", ""), "title": details["title"],
+         "year": details["year"], "rating": details["rating"], "poster": details.get("poster", "")}
+        for movie_id, details in movie_items
+    ]
+
+
+def calculate_stats(movies):
+    """
+    Calculate the same statistics as the 'Stats' menu command.
+
+    :param movies: Dictionary of movies.
+    :return: Dictionary with count, average, median, best and worst movies.
+    """
+    if not movies:
+        return {"count": 0}
+
+    rating_list = [float(details["rating"]) for details in movies.values()]
+    best_rating = max(rating_list)
+    worst_rating = min(rating_list)
+    return {
+        "count": len(rating_list),
+        "average_rating": round(sum(rating_list) / len(rating_list), 1),
+        "median_rating": round(statistics.median(rating_list), 1),
+        "best_movies": [details["title"] for details in movies.values()
+                        if float(details["rating"]) == best_rating],
+        "worst_movies": [details["title"] for details in movies.values()
+                         if float(details["rating"]) == worst_rating],
+    }
+
+
+def get_query_value(query, name, value_type, default=None):
+    """
+    Read a single query string parameter and convert it.
+
+    :param query: Parsed query string as returned by parse_qs.
+    :param name: Name of the parameter.
+    :param value_type: Callable converting the raw string, e.g. int or float.
+    :param default: Value returned if the parameter is missing or empty.
+    :return: Converted value.
+    :raises ValueError: If the value cannot be converted.
+    """
+    values = query.get(name)
+    if not values or values[0] == "":
+        return default
+    try:
+        return value_type(values[0])
+    except ValueError:
+        raise ValueError(f"Invalid value for '{name}': {values[0]}")
+
+
+def parse_query_params(query, parameters):
+    """
+    Read and convert all parameters of an endpoint.
+
+    :param query: Parsed query string as returned by parse_qs.
+    :param parameters: Dictionary mapping parameter names to (type, default).
+    :return: Dictionary mapping parameter names to converted values.
+    :raises ValueError: If a value cannot be converted.
+    """
+    return {
+        name: get_query_value(query, name, value_type, default)
+        for name, (value_type, default) in parameters.items()
+    }
+
+
+def create_server(file_path, host="127.0.0.1", port=8000, reload_interval=1.0):
+    """
+    Create the HTTP server for the given storage file without starting it.
+
+    :param file_path: Path to a .csv or .json movie file.
+    :param host: Interface to bind to.
+    :param port: Port to bind to, 0 picks a free port.
+    :param reload_interval: Minimum number of seconds between two checks of the file.
+    :return: The bound ThreadingHTTPServer.
+    """
+    server = ThreadingHTTPServer((host, port), MovieRequestHandler)
+    server.daemon_threads = True
+    server.snapshots = SnapshotHolder(create_storage(file_path, with_change_feed=False), reload_interval)
+    return server
+
+
+def _run_worker(server):
+    """
+    Serve requests in a forked worker until it is told to stop.
+    """
+    signal.signal(signal.SIGINT, signal.SIG_DFL)
+    signal.signal(signal.SIGTERM, signal.SIG_DFL)
+    try:
+        server.serve_forever()
+    finally:
+        os._exit(0)
+
+
+def serve(file_path, host="127.0.0.1", port=8000, workers=None, reload_interval=1.0):
+    """
+    Serve the movie API. With more than one worker the listening socket is
+    opened once and shared by forked worker processes, one per core by default.
+
+    :param file_path: Path to a .csv or .json movie file.
+    :param host: Interface to bind to.
+    :param port: Port to bind to.
+    :param workers: Number of worker processes, defaults to the number of CPUs.
+    :param reload_interval: Minimum number of seconds between two checks of the file.
+    """
+    server = create_server(file_path, host, port, reload_interval)
+    workers = workers or os.cpu_count() or 1
+    print(f"Serving {file_path} on http://{host}:{server.server_address[1]} with {workers} worker(s)")
+
+    # Pre-forking needs os.fork, which is not available on Windows
+    if workers == 1 or not hasattr(os, "fork"):
+        try:
+            server.serve_forever()
+        except KeyboardInterrupt:
+            pass
+        finally:
+            server.server_close()
+        return
+
+    children = []
+    for _ in range(workers):
+        pid = os.fork()
+        if pid == 0:
+            _run_worker(server)
+        children.append(pid)
+
+    def stop_workers(signum, frame):
+        for child_pid in children:
+            try:
+                os.kill(child_pid, signal.SIGTERM)
+            except ProcessLookupError:
+                pass
+
+    signal.signal(signal.SIGTERM, stop_workers)
+    try:
+        for child_pid in children:
+            os.waitpid(child_pid, 0)
+    except KeyboardInterrupt:
+        stop_workers(signal.SIGINT, None)
+        for child_pid in children:
+            os.waitpid(child_pid, 0)
+    finally:
+        server.server_close()
+
+
+def main():
+    """
+    Parse the command line arguments and start the server.
+    """
+    parser = argparse.ArgumentParser(description="Read-only HTTP/JSON API for the movie storage.")
+    parser.add_argument("file_path", nargs="?", default="data/movies.csv",
+                        help="Path to a .csv or .json movie file")
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--port", type=int, default=8000)
+    parser.add_argument("--workers", type=int, default=None,
+                        help="Number of worker processes, defaults to the number of CPUs")
+    parser.add_argument("--reload-interval", type=float, default=1.0,
+                        help="Seconds between checks of the storage file for changes")
+    args = parser.parse_args()
+    serve(args.file_path, args.host, args.port, args.workers, args.reload_interval)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,77 @@
+import argparse
+import os
+import random
+import time
+
+from parallel_query import ParallelCatalog, filter_movies, search_movies
+
+
+WORDS = ["the", "dark", "night", "return", "star", "love", "war", "king", "lost", "city",
+         "river", "ghost", "last", "summer", "blue", "dream", "iron", "secret", "storm", "amelie"]
+
+
+def generate_movies(row_count, seed=42):
+    """
+    Generate a synthetic catalog in the format returned by IStorage.list_movies().
+
+    :param row_count: Number of movies.
+    :param seed: Random seed, so runs are comparable.
+    :return: Dictionary of movies keyed by movie id.
+    """
+    generator = random.Random(seed)
+    movies = {}
+    for row in range(row_count):
+        title = " ".join(generator.choice(WORDS) for _ in range(3)).title() + f" {row}"
+        movies[f"tt{row:08d}"] = {
+            "title": title,
+            "year": generator.randint(1920, 2024),
+            "rating": round(generator.uniform(1, 10), 1),
+            "poster": "",
+            "imdb_id": f"tt{row:08d}",
+        }
+    return movies
+
+
+def measure(label, function):
+    """
+    Run a function once, print how long it took and return its result.
+    """
+    start = time.perf_counter()
+    result = function()
+    elapsed = time.perf_counter() - start
+    print(f"{label:<32} {elapsed:8.3f}s  {len(result)} matches")
+    return result, elapsed
+
+
+def main():
+    """
+    Compare serial and parallel search/filter on a synthetic catalog.
+    """
+    parser = argparse.ArgumentParser(description="Benchmark the parallel search and filter.")
+    parser.add_argument("--rows", type=int, default=5000000)
+    parser.add_argument("--workers", type=int, default=None)
+    args = parser.parse_args()
+
+    print(f"Generating {args.rows} movies, {os.cpu_count()} CPUs available")
+    movies = generate_movies(args.rows)
+    serial_search, serial_search_time = measure(
+        "serial search", lambda: search_movies(movies, "night"))
+    serial_filter, serial_filter_time = measure(
+        "serial filter", lambda: filter_movies(movies, 8.0, 1990, 2010))
+
+    start = time.perf_counter()
+    with ParallelCatalog(movies, workers=args.workers) as catalog:
+        print(f"{'build columns + start workers':<32} {time.perf_counter() - start:8.3f}s")
+        parallel_search, parallel_search_time = measure(
+            "parallel search", lambda: search_movies(movies, "night", catalog))
+        parallel_filter, parallel_filter_time = measure(
+            "parallel filter", lambda: filter_movies(movies, 8.0, 1990, 2010, catalog))
+
+    assert list(parallel_search) == list(serial_search), "search results differ"
+    assert list(parallel_filter) == list(serial_filter), "filter results differ"
+    print(f"Search speedup: {serial_search_time / parallel_search_time:.1f}x, "
+          f"filter speedup: {serial_filter_time / parallel_filter_time:.1f}x")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,98 @@
+import argparse
+import os
+import tempfile
+import time
+import tracemalloc
+
+from storage.storage_csv import StorageCsv
+from storage.streaming import CsvMovieWriter
+from template_engine import iter_movie_grid, load_template
+
+
+TEMPLATE_PATH = os.path.join("_static", "index_template.html")
+
+
+def write_catalog(file_path, row_count):
+    """
+    Write a synthetic movie catalog to a CSV file.
+
+    :param file_path: Path to the CSV file.
+    :param row_count: Number of movies.
+    """
+    writer = CsvMovieWriter(file_path)
+    for row in range(row_count):
+        writer.write({"title": f"Movie <{row}> & Sequel", "year": 1900 + row % 125,
+                      "rating": round(row % 100 / 10, 1), "poster": f"https://example.com/{row}.jpg",
+                      "imdb_id": f"tt{row:08d}"})
+    writer.close()
+
+
+def render_in_memory(storage, output_path):
+    """
+    Render the website the way it was done before the template engine:
+    the whole grid is built as one string and put into the template with str.replace.
+    """
+    with open(TEMPLATE_PATH, "r") as file:
+        template_content = file.read()
+    template_content = template_content.replace("__TEMPLATE_TITLE__", "My Movie Collection")
+    movie_grid_html = ""
+    for details in storage.list_movies().values():
+        movie_grid_html += f"""
+            <div class="movie-item">
+                <h2>{details['title']} ({details['year']})</h2>
+                <p>Rating: {details['rating']}</p>
+                <img src="{details['poster']}" alt="Poster for {details['title']}">
+            </div>
+            """
+    template_content = template_content.replace("__TEMPLATE_MOVIE_GRID__", movie_grid_html)
+    with open(output_path, "w") as file:
+        file.write(template_content)
+
+
+def render_streaming(storage, output_path):
+    """
+    Render the website with the compiled template, streaming the movies from the storage.
+    """
+    load_template(TEMPLATE_PATH).render_to_path(output_path, {
+        "TITLE": "My Movie Collection",
+        "MOVIE_GRID": iter_movie_grid(storage.iter_movies()),
+    })
+
+
+def measure(label, render_function, storage, output_path, row_count):
+    """
+    Print the duration, throughput and peak Python memory of one renderer.
+    """
+    start = time.perf_counter()
+    render_function(storage, output_path)
+    elapsed = time.perf_counter() - start
+    output_megabytes = os.path.getsize(output_path) / 1024 / 1024
+
+    tracemalloc.start()
+    render_function(storage, output_path)
+    peak_megabytes = tracemalloc.get_traced_memory()[1] / 1024 / 1024
+    tracemalloc.stop()
+
+    print(f"{label:<10} {elapsed:7.2f}s  {row_count / elapsed:9.0f} movies/s  "
+          f"{output_megabytes / elapsed:6.1f} MB/s  peak memory {peak_megabytes:8.1f} MB")
+
+
+def main():
+    """
+    Compare the in-memory and the streaming website rendering.
+    """
+    parser = argparse.ArgumentParser(description="Benchmark the website rendering.")
+    parser.add_argument("--rows", type=int, default=200000)
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as directory:
+        catalog_path = os.path.join(directory, "movies.csv")
+        write_catalog(catalog_path, args.rows)
+        storage = StorageCsv(catalog_path)
+        print(f"Rendering {args.rows} movies")
+        measure("in memory", render_in_memory, storage, os.path.join(directory, "old.html"), args.rows)
+        measure("streaming", render_streaming, storage, os.path.join(directory, "new.html"), args.rows)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,19 @@
+import sys
+from storage.storage_factory import create_storage
+
+
+def main():
+    """
+    Remove duplicate movies from a storage file, e.g. `python dedupe_storage.py data/movies.csv`.
+    """
+    if len(sys.argv) != 2:
+        print("Usage: python dedupe_storage.py <path to .csv or .json file>")
+        sys.exit(1)
+
+    storage = create_storage(sys.argv[1])
+    duplicates = storage.deduplicate()
+    print(f"Removed {duplicates} duplicate movie(s) from {sys.argv[1]}")
+
+
+if __name__ == "__main__":
+    main()
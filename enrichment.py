@@ -0,0 +1,322 @@
+import argparse
+import json
+import os
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor, as_completed
+
+import requests
+
+from storage.atomic_file import atomic_write
+from storage.movie_index import make_movie_id, normalize_title
+from storage.storage_factory import create_storage
+
+
+OMDB_BASE_URL = "http://www.omdbapi.com/"
+MISSING_POSTERS = ("", "N/A")
+
+
+class RateLimiter:
+    """
+    Token bucket shared by all worker threads, so no more than
+    `requests_per_second` requests are sent on average.
+    """
+
+    def __init__(self, requests_per_second, burst=1):
+        """
+        Initialize the limiter with a full bucket.
+
+        :param requests_per_second: Average number of requests allowed per second.
+        :param burst: Number of requests that may be sent at once.
+        """
+        self._rate = requests_per_second
+        self._capacity = burst
+        self._tokens = burst
+        self._last_refill = time.monotonic()
+        self._lock = threading.Lock()
+
+
+    def wait(self):
+        """
+        Block until a request may be sent.
+        """
+        while True:
+            with self._lock:
+                now = time.monotonic()
+                self._tokens = min(self._capacity, self._tokens + (now - self._last_refill) * self._rate)
+                self._last_refill = now
+                if self._tokens >= 1:
+                    self._tokens -= 1
+                    return
+                sleep_time = (1 - self._tokens) / self._rate
+            time.sleep(sleep_time)
+
+
+class EnrichmentCheckpoint:
+    """
+    Remember when each movie was last looked up, in a JSON file, so a
+    restarted job skips the movies it already handled.
+    """
+
+    def __init__(self, file_path):
+        """
+        Load the checkpoint file if it exists.
+
+        :param file_path: Path to the checkpoint JSON file.
+        """
+        self.file_path = file_path
+        self.refreshed = {}
+        if os.path.exists(file_path):
+            with open(file_path, "r") as checkpoint_file:
+                self.refreshed = json.load(checkpoint_file).get("refreshed", {})
+
+
+    def is_fresh(self, movie_id, max_age_seconds):
+        """
+        Check whether a movie was looked up recently enough.
+
+        :param movie_id: Id of the movie.
+        :param max_age_seconds: Maximum age of a lookup, or None if any lookup counts.
+        :return: True if the movie does not need another lookup.
+        """
+        if movie_id not in self.refreshed:
+            return False
+        return max_age_seconds is None or time.time() - self.refreshed[movie_id] < max_age_seconds
+
+
+    def mark_refreshed(self, movie_ids):
+        """
+        Record a lookup of the given movies.
+
+        :param movie_ids: Ids of the looked up movies.
+        """
+        now = time.time()
+        for movie_id in movie_ids:
+            self.refreshed[movie_id] = now
+
+
+    def save(self):
+        """
+        Write the checkpoint file through a temporary file.
+        """
+        with atomic_write(self.file_path) as checkpoint_file:
+            json.dump({"refreshed": self.refreshed}, checkpoint_file)
+
+
+def needs_enrichment(movie_id, details, checkpoint, max_age_seconds=None):
+    """
+    Check whether a movie should be looked up on OMDb: it has no poster,
+    no rating or no imdbID and was not looked up yet, or max_age_seconds
+    is given and its last lookup is older than that.
+
+    :param movie_id: Id of the movie.
+    :param details: Movie details as returned by IStorage.list_movies().
+    :param checkpoint: EnrichmentCheckpoint of previous runs.
+    :param max_age_seconds: Refresh complete movies after this many seconds, None never does.
+    :return: True if the movie should be looked up.
+    """
+    incomplete = (
+        details.get("poster", "") in MISSING_POSTERS
+        or not details.get("rating")
+        or not details.get("imdb_id")
+    )
+    if not incomplete and max_age_seconds is None:
+        return False
+    return not checkpoint.is_fresh(movie_id, max_age_seconds)
+
+
+def fetch_omdb_details(session, base_url, api_key, details, rate_limiter):
+    """
+    Look up one movie on OMDb, by imdbID if known, otherwise by title and year.
+    If OMDb finds nothing, the title is looked up alone as a fallback, e.g. for
+    a stored year that is a bit off, but a result is only accepted if its
+    year is within one year of the stored one, so a remake or the original
+    of the movie is never taken for it.
+
+    :param session: requests.Session used for the connection pooling.
+    :param base_url: OMDb API URL.
+    :param api_key: OMDb API key.
+    :param details: Movie details as returned by IStorage.list_movies().
+    :param rate_limiter: RateLimiter shared by all lookups.
+    :return: OMDb response dictionary, or None if the movie was not found.
+    :raises requests.RequestException: If OMDb cannot be reached or returns an error status.
+    """
+    if details.get("imdb_id"):
+        lookups = [{"i": details["imdb_id"]}]
+    else:
+        lookups = [{"t": details["title"], "y": details["year"]}, {"t": details["title"]}]
+
+    for params in lookups:
+        rate_limiter.wait()
+        response = session.get(base_url, params={"apikey": api_key, **params}, timeout=10)
+        response.raise_for_status()
+        movie_data = response.json()
+        if movie_data.get("Response") != "True":
+            continue
+        if "i" in params:
+            return movie_data
+        if (normalize_title(movie_data.get("Title", "")) == normalize_title(details["title"])
+                and years_match(movie_data.get("Year", ""), details["year"])):
+            return movie_data
+    return None
+
+
+def years_match(omdb_year, year):
+    """
+    Check whether an OMDb year is within one year of a stored year.
+
+    :param omdb_year: Year from OMDb, e.g. "1997" or "2008–2013" for a series.
+    :param year: Stored release year of the movie.
+    :return: True if the first year of omdb_year differs by at most one year.
+    """
+    first_year = omdb_year[:4]
+    return first_year.isdigit() and abs(int(first_year) - int(year)) <= 1
+
+
+def get_changes(details, movie_data, refresh=False):
+    """
+    Compare a stored movie with its OMDb data. Only the missing fields are
+    filled in, so e.g. a rating the user set is kept, unless refresh is set.
+
+    :param details: Movie details as returned by IStorage.list_movies().
+    :param movie_data: OMDb response dictionary.
+    :param refresh: Also replace fields that are set but differ from OMDb.
+    :return: Dictionary of the changed fields, empty if nothing changed.
+    """
+    changes = {}
+    if movie_data.get("imdbRating", "N/A") != "N/A" and (refresh or not details.get("rating")):
+        rating = float(movie_data["imdbRating"])
+        if rating != details.get("rating"):
+            changes["rating"] = rating
+    if movie_data.get("Poster", "N/A") != "N/A" and (refresh or details.get("poster", "") in MISSING_POSTERS):
+        if movie_data["Poster"] != details.get("poster"):
+            changes["poster"] = movie_data["Poster"]
+    if movie_data.get("imdbID") and (refresh or not details.get("imdb_id")):
+        if movie_data["imdbID"] != details.get("imdb_id"):
+            changes["imdb_id"] = movie_data["imdbID"]
+    return changes
+
+
+def enrich_storage(storage, api_key, base_url=OMDB_BASE_URL, checkpoint_path=None,
+                   max_age_seconds=None, workers=4, requests_per_second=5.0, batch_size=20):
+    """
+    Complete or refresh movies of a storage from OMDb. Incomplete movies
+    only get their missing fields filled in; with max_age_seconds, the
+    rating, poster and imdbID of stale movies are replaced by the OMDb data
+    as well. Lookups run concurrently but rate limited; the changes are
+    written to the storage in batches, and after every batch the checkpoint
+    is saved so an interrupted job can be restarted.
+
+    :param storage: An instance of a storage class that implements IStorage.
+    :param api_key: OMDb API key.
+    :param base_url: OMDb API URL, e.g. the address of a local stub.
+    :param checkpoint_path: Path to the checkpoint file, defaults to the storage file with '.enrich' appended.
+    :param max_age_seconds: Refresh complete movies after this many seconds, None never does.
+    :param workers: Number of concurrent lookups.
+    :param requests_per_second: Maximum average number of OMDb requests per second.
+    :param batch_size: Number of looked up movies per storage write.
+    :return: Dictionary with the number of checked, updated, not found, conflicting and failed movies.
+    """
+    checkpoint = EnrichmentCheckpoint(checkpoint_path or f"{storage.file_path}.enrich")
+    movies = storage.list_movies()
+    candidates = {
+        movie_id: details for movie_id, details in movies.items()
+        if needs_enrichment(movie_id, details, checkpoint, max_age_seconds)
+    }
+    print(f"{len(candidates)} of {len(movies)} movies need to be refreshed")
+
+    counters = {"checked": 0, "updated": 0, "not_found": 0, "conflicting": 0, "failed": 0}
+    rate_limiter = RateLimiter(requests_per_second, burst=workers)
+    pending_updates = {}
+    # Id of each looked up movie after the update, by its id before
+    pending_checked_ids = {}
+
+    def write_batch():
+        rejected_ids = storage.update_movies(pending_updates) if pending_updates else []
+        for movie_id in rejected_ids:
+            # Another movie already has this imdbID, so the movie keeps its id
+            print(f"Not updating '{candidates[movie_id]['title']}': IMDb id "
+                  f"{pending_updates[movie_id]['imdb_id']} belongs to another movie")
+            pending_checked_ids[movie_id] = movie_id
+        counters["updated"] -= len(rejected_ids)
+        counters["conflicting"] += len(rejected_ids)
+        checkpoint.mark_refreshed(pending_checked_ids.values())
+        checkpoint.save()
+        print(f"{counters['checked']} checked, {counters['updated']} updated, "
+              f"{counters['not_found']} not found, {counters['conflicting']} conflicting, "
+              f"{counters['failed']} failed")
+        pending_updates.clear()
+        pending_checked_ids.clear()
+
+    executor = ThreadPoolExecutor(max_workers=workers)
+    with requests.Session() as session:
+        futures = {
+            executor.submit(fetch_omdb_details, session, base_url, api_key, details, rate_limiter): movie_id
+            for movie_id, details in candidates.items()
+        }
+        try:
+            for future in as_completed(futures):
+                movie_id = futures[future]
+                details = candidates[movie_id]
+                try:
+                    movie_data = future.result()
+                except (requests.RequestException, ValueError) as e:
+                    # Not checkpointed, so the movie is retried on the next run
+                    print(f"Error looking up '{details['title']}': {e}")
+                    counters["failed"] += 1
+                    continue
+
+                counters["checked"] += 1
+                # Set fields are only overwritten by the periodic refresh
+                changes = get_changes(details, movie_data, max_age_seconds is not None) if movie_data else {}
+                if movie_data is None:
+                    counters["not_found"] += 1
+                elif changes:
+                    counters["updated"] += 1
+                    pending_updates[movie_id] = changes
+                # The movie is stored under its imdbID once it has one
+                merged = {**details, **changes}
+                pending_checked_ids[movie_id] = make_movie_id(merged["title"], merged["year"], merged["imdb_id"])
+
+                if len(pending_checked_ids) >= batch_size:
+                    write_batch()
+        finally:
+            # Queued lookups are dropped if the job is interrupted
+            executor.shutdown(cancel_futures=True)
+
+    write_batch()
+    return counters
+
+
+def main():
+    """
+    Parse the command line arguments and run the enrichment job.
+    """
+    parser = argparse.ArgumentParser(description="Refresh incomplete or stale movies from OMDb.")
+    parser.add_argument("file_path", nargs="?", default="data/movies.csv",
+                        help="Path to a .csv or .json movie file")
+    parser.add_argument("--base-url", default=OMDB_BASE_URL, help="OMDb API URL, e.g. of a local stub")
+    parser.add_argument("--api-key", default=None, help="OMDb API key, defaults to OMDB_API_KEY from config.py")
+    parser.add_argument("--max-age-days", type=float, default=None,
+                        help="Also refresh complete movies last looked up this many days ago")
+    parser.add_argument("--workers", type=int, default=4)
+    parser.add_argument("--rate", type=float, default=5.0, help="Maximum OMDb requests per second")
+    parser.add_argument("--batch-size", type=int, default=20)
+    parser.add_argument("--checkpoint", default=None, help="Path to the checkpoint file")
+    args = parser.parse_args()
+
+    api_key = args.api_key
+    if api_key is None:
+        from config import OMDB_API_KEY
+        api_key = OMDB_API_KEY
+
+    max_age_seconds = args.max_age_days * 24 * 3600 if args.max_age_days is not None else None
+    counters = enrich_storage(
+        create_storage(args.file_path), api_key, args.base_url, args.checkpoint,
+        max_age_seconds, args.workers, args.rate, args.batch_size
+    )
+    print(f"Done: {counters['updated']} of {counters['checked']} checked movies updated")
+
+
+if __name__ == "__main__":
+    main()
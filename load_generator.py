@@ -0,0 +1,118 @@
+import argparse
+import http.client
+import statistics
+import threading
+import time
+
+
+DEFAULT_PATHS = [
+    "/movies",
+    "/movies/search?q=the",
+    "/movies/filter?min_rating=8&start_year=1990",
+    "/movies/stats",
+    "/movies/random",
+]
+
+
+def run_client(host, port, paths, deadline, use_etags, results):
+    """
+    Send requests over one keep-alive connection until the deadline.
+
+    :param host: Server host.
+    :param port: Server port.
+    :param paths: Request paths, used round-robin.
+    :param deadline: time.monotonic() value at which to stop.
+    :param use_etags: Send If-None-Match with the last ETag seen for each path.
+    :param results: Dictionary collecting latencies, status counts and errors.
+    """
+    connection = http.client.HTTPConnection(host, port, timeout=10)
+    etags = {}
+    latencies = []
+    status_counts = {}
+    errors = 0
+    request_number = 0
+
+    while time.monotonic() < deadline:
+        path = paths[request_number % len(paths)]
+        request_number += 1
+        headers = {}
+        if use_etags and path in etags:
+            headers["If-None-Match"] = etags[path]
+
+        start = time.perf_counter()
+        try:
+            connection.request("GET", path, headers=headers)
+            response = connection.getresponse()
+            response.read()
+        except (OSError, http.client.HTTPException):
+            errors += 1
+            connection.close()
+            connection = http.client.HTTPConnection(host, port, timeout=10)
+            continue
+        latencies.append(time.perf_counter() - start)
+
+        status_counts[response.status] = status_counts.get(response.status, 0) + 1
+        etag = response.getheader("ETag")
+        if etag:
+            etags[path] = etag
+
+    connection.close()
+    with results["lock"]:
+        results["latencies"].extend(latencies)
+        results["errors"] += errors
+        for status, count in status_counts.items():
+            results["status_counts"][status] = results["status_counts"].get(status, 0) + count
+
+
+def run_load(host, port, concurrency, duration, paths, use_etags):
+    """
+    Generate load against the movie API and print a summary.
+
+    :param host: Server host.
+    :param port: Server port.
+    :param concurrency: Number of concurrent client connections.
+    :param duration: Number of seconds to run.
+    :param paths: Request paths, used round-robin by every client.
+    :param use_etags: Send conditional requests.
+    """
+    results = {"lock": threading.Lock(), "latencies": [], "status_counts": {}, "errors": 0}
+    deadline = time.monotonic() + duration
+    threads = [
+        threading.Thread(target=run_client, args=(host, port, paths, deadline, use_etags, results))
+        for _ in range(concurrency)
+    ]
+    start = time.monotonic()
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    elapsed = time.monotonic() - start
+
+    latencies = sorted(results["latencies"])
+    print(f"Requests: {len(latencies)} in {elapsed:.1f}s ({len(latencies) / elapsed:.0f} req/s)")
+    print(f"Errors: {results['errors']}")
+    print(f"Status codes: {dict(sorted(results['status_counts'].items()))}")
+    if latencies:
+        p99_index = min(len(latencies) - 1, int(len(latencies) * 0.99))
+        print(f"Latency median: {statistics.median(latencies) * 1000:.2f} ms, "
+              f"p99: {latencies[p99_index] * 1000:.2f} ms")
+
+
+def main():
+    """
+    Parse the command line arguments and run the load test.
+    """
+    parser = argparse.ArgumentParser(description="Generate load against the movie API server.")
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--port", type=int, default=8000)
+    parser.add_argument("--concurrency", type=int, default=16)
+    parser.add_argument("--duration", type=float, default=10.0)
+    parser.add_argument("--etags", action="store_true",
+                        help="Send If-None-Match with the last ETag seen for each path")
+    parser.add_argument("paths", nargs="*", default=DEFAULT_PATHS)
+    args = parser.parse_args()
+    run_load(args.host, args.port, args.concurrency, args.duration, args.paths, args.etags)
+
+
+if __name__ == "__main__":
+    main()
@@ -1,15 +1,18 @@
+import sys
 from movie_app import MovieApp
-from storage.storage_csv import StorageCsv
-# Or switch to StorageJson if needed5
-# from storage.storage_json import StorageJson
+from storage.storage_factory import create_storage
+
+DEFAULT_STORAGE_PATH = 'data/movies.csv'
+
 
 def main():
     """
     Main function to initialize and run the movie application.
+    The storage backend is picked from the extension of the file given
+    on the command line, e.g. `python main.py data/movies.json`.
     """
-    storage = StorageCsv('data/movies.csv')
-    # If you want to use JSON storage, switch to:
-    # storage = StorageJson('data/movies.json')
+    file_path = sys.argv[1] if len(sys.argv) > 1 else DEFAULT_STORAGE_PATH
+    storage = create_storage(file_path)
     movie_app = MovieApp(storage)
     movie_app.run()
 
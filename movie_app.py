@@ -3,6 +3,8 @@ import statistics
 import requests
 import os
 from config import OMDB_API_KEY
+from parallel_query import CatalogCache, filter_movies, search_movies
+from template_engine import iter_movie_grid, load_template
 
 
 class MovieApp:
@@ -13,6 +15,11 @@ class MovieApp:
         :param storage: An instance of a storage class that implements IStorage.
         """
         self._storage = storage
+        # Search and filter reuse the movies until the storage file changes, and
+        # large catalogs are queried by worker processes. The cache is tied to the
+        # storage file; file_path is not part of IStorage, so storages without one
+        # are reloaded for every query and queried serially.
+        self._catalog_cache = CatalogCache(getattr(storage, "file_path", None))
 
 
     def _command_list_movies(self):
@@ -21,8 +28,8 @@ class MovieApp:
         """
         movies = self._storage.list_movies()
         print(f"{len(movies)} movies in total")
-        for title, details in movies.items():
-            movie_name = title
+        for details in movies.values():
+            movie_name = details["title"]
             movie_rating = details.get("rating", "N/A")
             movie_year = details.get("year", "N/A")
             print(f"{movie_name} ({movie_year}): {movie_rating}")
@@ -55,7 +62,8 @@ class MovieApp:
                     movie_data["Title"],
                     int(movie_data["Year"]),
                     float(rating) if rating is not None else 0.0,  # Use 0.0 or another default value if rating is None
-                    movie_data["Poster"]
+                    movie_data["Poster"],
+                    movie_data.get("imdbID")
                 )
                 print(f"Movie '{movie_data['Title']}' added successfully!")
             else:
@@ -73,19 +81,19 @@ class MovieApp:
             print("No movies available to delete.")
             return
 
-        movie_titles = list(movies.keys())
-        for index, title in enumerate(movie_titles, start=1):
-            print(f"{index}. {title}")
+        movie_ids = list(movies.keys())
+        for index, movie_id in enumerate(movie_ids, start=1):
+            print(f"{index}. {movies[movie_id]['title']} ({movies[movie_id]['year']})")
 
         while True:
             try:
                 selected_index = int(input("Enter the number of the movie you want to delete: ")) - 1
-                if selected_index < 0 or selected_index >= len(movie_titles):
+                if selected_index < 0 or selected_index >= len(movie_ids):
                     raise IndexError
 
-                selected_title = movie_titles[selected_index]
-                self._storage.delete_movie(selected_title)
-                print(f"Movie '{selected_title}' deleted successfully!")
+                selected_id = movie_ids[selected_index]
+                self._storage.delete_movie(selected_id)
+                print(f"Movie '{movies[selected_id]['title']}' deleted successfully!")
                 break
             except (ValueError, IndexError):
                 print("Invalid input. Please enter a valid number corresponding to the movie.")
@@ -95,15 +103,15 @@ class MovieApp:
         """
         Prompt the user to update the rating of an existing movie in the storage.
         """
-        movies = self._storage.list_movies()
-        movie_titles = list(movies.keys())
         user_input_movie_name = input("Enter name of movie you want to update: ")
+        matching_ids = self._storage.find_movie_ids(user_input_movie_name)
 
-        if user_input_movie_name in movie_titles:
+        if matching_ids:
+            selected_id = self._choose_movie(matching_ids)
             while True:
                 try:
                     user_input_new_rating = float(input("Enter new movie rating: "))
-                    self._storage.update_movie(user_input_movie_name, user_input_new_rating)
+                    self._storage.update_movie(selected_id, user_input_new_rating)
                     print("Rating successfully changed!")
                     break
                 except ValueError:
@@ -133,11 +141,11 @@ class MovieApp:
         worst_rating = min(rating_list)
 
         best_movies = [
-            (title, details["rating"]) for title, details in movies.items()
+            (details["title"], details["rating"]) for details in movies.values()
             if float(details["rating"]) == best_rating
         ]
         worst_movies = [
-            (title, details["rating"]) for title, details in movies.items()
+            (details["title"], details["rating"]) for details in movies.values()
             if float(details["rating"]) == worst_rating
         ]
 
@@ -158,11 +166,10 @@ class MovieApp:
             print("No movies available to pick a random movie.")
             return
 
-        # Convert dictionary items to a list of tuples
-        movie_items = list(movies.items())
-        random_movie_tuple = random.choice(movie_items)
-        title = random_movie_tuple[0]
-        details = random_movie_tuple[1]
+        # Convert dictionary values to a list
+        movie_list = list(movies.values())
+        details = random.choice(movie_list)
+        title = details["title"]
         rating = details["rating"]
         print(f"You could watch this movie: {title}, it's rated {rating}")
 
@@ -172,23 +179,20 @@ class MovieApp:
         Prompt the user to search for a movie by title.
         The search is case-insensitive and matches partial titles.
         """
-        movies = self._storage.list_movies()
         user_input_movie_name = input("Enter part of movie name: ").strip()
 
-        matching_movies = {
-            title: details for title, details in movies.items()
-            if user_input_movie_name.lower() in title.lower()
-        }
+        movies, catalog = self._catalog_cache.get(self._storage.list_movies)
+        matching_movies = search_movies(movies, user_input_movie_name, catalog)
 
         if not matching_movies:
             print(f"No matches found for '{user_input_movie_name}'.")
             return
 
-        all_movie_titles_with_index = [
-            (i, title) for i, title in enumerate(matching_movies.keys(), start=1)
+        all_movie_ids_with_index = [
+            (i, movie_id) for i, movie_id in enumerate(matching_movies.keys(), start=1)
         ]
-        for index, title in all_movie_titles_with_index:
-            print(f"{index}. {title}")
+        for index, movie_id in all_movie_ids_with_index:
+            print(f"{index}. {matching_movies[movie_id]['title']}")
 
         while True:
             try:
@@ -197,19 +201,19 @@ class MovieApp:
                 ).strip()
                 if selected_index == "":
                     print("Listing all matching movies:")
-                    for title, details in matching_movies.items():
-                        print(f"\nTitle: {title}")
+                    for details in matching_movies.values():
+                        print(f"\nTitle: {details['title']}")
                         print(f"Year: {details['year']}")
                         print(f"Rating: {details['rating']}")
                         print(f"Poster: {details.get('poster', 'N/A')}")
                     break
                 else:
                     selected_index = int(selected_index) - 1
-                    if selected_index < 0 or selected_index >= len(all_movie_titles_with_index):
+                    if selected_index < 0 or selected_index >= len(all_movie_ids_with_index):
                         raise IndexError
 
-                    selected_title = all_movie_titles_with_index[selected_index][1]
-                    selected_movie = matching_movies[selected_title]
+                    selected_id = all_movie_ids_with_index[selected_index][1]
+                    selected_movie = matching_movies[selected_id]
 
                     print(f"\nTitle: {selected_movie['title']}")
                     print(f"Year: {selected_movie['year']}")
@@ -233,8 +237,8 @@ class MovieApp:
             movies.items(), key=lambda item: item[1]["rating"], reverse=True
         )
 
-        for index, (title, details) in enumerate(movies_sorted_by_rating_list, start=1):
-            print(f"{index}. {title} ({details['year']}): {details['rating']}")
+        for index, (movie_id, details) in enumerate(movies_sorted_by_rating_list, start=1):
+            print(f"{index}. {details['title']} ({details['year']}): {details['rating']}")
 
     def _command_movies_sorted_by_year(self):
         """
@@ -252,14 +256,14 @@ class MovieApp:
             movies.items(), key=lambda item: item[1]["year"], reverse=descending_order
         )
 
-        for index, (title, details) in enumerate(movies_sorted_by_year_list, start=1):
-            print(f"{index}. {title} ({details['year']}): {details['rating']}")
+        for index, (movie_id, details) in enumerate(movies_sorted_by_year_list, start=1):
+            print(f"{index}. {details['title']} ({details['year']}): {details['rating']}")
 
     def _command_filter_movies(self):
         """
         Filter and print movies based on user-provided rating and year range.
         """
-        movies = self._storage.list_movies()
+        movies, catalog = self._catalog_cache.get(self._storage.list_movies)
         if not movies:
             print("No movies available to filter.")
             return
@@ -272,19 +276,16 @@ class MovieApp:
         start_year = int(start_year_input) if start_year_input else None
         end_year = int(end_year_input) if end_year_input else None
 
-        filtered_movies = {
-            title: details for title, details in movies.items()
-            if (minimum_rating is None or details["rating"] >= minimum_rating) and
-               (start_year is None or details["year"] >= start_year) and
-               (end_year is None or details["year"] <= end_year)
-        }
+        filtered_movies = filter_movies(
+            movies, minimum_rating, start_year, end_year, catalog
+        )
 
         if not filtered_movies:
             print("No movies found matching the filters.")
             return
 
-        for index, (title, details) in enumerate(filtered_movies.items(), start=1):
-            print(f"{index}. {title} ({details['year']}): {details['rating']}")
+        for index, (movie_id, details) in enumerate(filtered_movies.items(), start=1):
+            print(f"{index}. {details['title']} ({details['year']}): {details['rating']}")
 
 
     def _command_generate_website(self):
@@ -299,36 +300,46 @@ class MovieApp:
             print(f"Error: Template file not found at {template_path}")
             return
 
-        with open(template_path, 'r') as file:
-            template_content = file.read()
-
-        # Replace the __TEMPLATE_TITLE__ placeholder
-        template_content = template_content.replace("__TEMPLATE_TITLE__", "My Movie Collection")
-
-        # Generate the movie grid HTML
-        movie_grid_html = ""
-        movies = self._storage.list_movies()
-        for title, details in movies.items():
-            movie_grid_html += f"""
-            <div class="movie-item">
-                <h2>{title} ({details['year']})</h2>
-                <p>Rating: {details['rating']}</p>
-                <img src="{details['poster']}" alt="Poster for {title}">
-            </div>
-            """
-
-        # Replace the __TEMPLATE_MOVIE_GRID__ placeholder
-        template_content = template_content.replace("__TEMPLATE_MOVIE_GRID__", movie_grid_html)
-
-        # Write the generated content to the output file
-        with open(output_path, 'w') as file:
-            file.write(template_content)
+        # The movies are streamed from the storage straight into the output file,
+        # a storage file that turns out to be broken on the way is only found then
+        try:
+            template = load_template(template_path)
+            template.render_to_path(output_path, {
+                "TITLE": "My Movie Collection",
+                "MOVIE_GRID": iter_movie_grid(self._storage.iter_movies())
+            })
+        except (ValueError, KeyError, OSError) as e:
+            print(f"Error: Website could not be generated: {e}")
+            return
 
         # Print the full path of the generated file
         full_output_path = os.path.abspath(output_path)
         print(f"Website was generated successfully at {full_output_path}")
 
 
+    def _choose_movie(self, movie_ids):
+        """
+        Let the user pick one movie if a title matches several movies, e.g. remakes.
+
+        :param movie_ids: Ids of the matching movies.
+        :return: Id of the selected movie.
+        """
+        if len(movie_ids) == 1:
+            return movie_ids[0]
+
+        movies = self._storage.list_movies()
+        for index, movie_id in enumerate(movie_ids, start=1):
+            print(f"{index}. {movies[movie_id]['title']} ({movies[movie_id]['year']})")
+        while True:
+            try:
+                selected_index = int(input("Several movies have this title, enter the number of the one you mean: ")) - 1
+                if selected_index < 0 or selected_index >= len(movie_ids):
+                    raise IndexError
+                return movie_ids[selected_index]
+            except (ValueError, IndexError):
+                print("Invalid input. Please enter a valid number corresponding to the movie.")
+
+
     def _get_printable_string_from_tuple(self, a_list):
         """
         Convert a list of tuples into a string for printing.
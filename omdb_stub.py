@@ -0,0 +1,92 @@
+import argparse
+import json
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from urllib.parse import parse_qs, urlsplit
+
+from storage.movie_index import normalize_title
+
+
+class OmdbStubHandler(BaseHTTPRequestHandler):
+    """
+    Answer OMDb lookups by imdbID ('i') or by title ('t') and optional
+    year ('y') from a fixture file, in the same format as the real API.
+    """
+
+    def do_GET(self):
+        """
+        Look up the requested movie in the fixture.
+        """
+        query = {name: values[0] for name, values in parse_qs(urlsplit(self.path).query).items()}
+        if "i" in query:
+            movie_data = self.server.movies_by_id.get(query["i"])
+        else:
+            movie_data = next(
+                (movie for movie in self.server.movies_by_title.get(normalize_title(query.get("t", "")), [])
+                 if "y" not in query or movie["Year"].startswith(query["y"])),
+                None
+            )
+
+        if movie_data is None:
+            movie_data = {"Response": "False", "Error": "Movie not found!"}
+        else:
+            movie_data = {**movie_data, "Response": "True"}
+
+        body = json.dumps(movie_data).encode("utf-8")
+        self.send_response(200)
+        self.send_header("Content-Type", "application/json")
+        self.send_header("Content-Length", str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+
+    def log_message(self, format, *args):
+        """
+        Silence the per-request log lines.
+        """
+        pass
+
+
+def create_stub_server(fixture_path, host="127.0.0.1", port=8001):
+    """
+    Create the stub server for the given fixture without starting it.
+
+    :param fixture_path: Path to a JSON list of OMDb movie responses.
+    :param host: Interface to bind to.
+    :param port: Port to bind to, 0 picks a free port.
+    :return: The bound ThreadingHTTPServer.
+    """
+    with open(fixture_path, "r") as fixture_file:
+        movies = json.load(fixture_file)
+
+    server = ThreadingHTTPServer((host, port), OmdbStubHandler)
+    server.daemon_threads = True
+    server.movies_by_id = {movie["imdbID"]: movie for movie in movies}
+    server.movies_by_title = {}
+    for movie in movies:
+        server.movies_by_title.setdefault(normalize_title(movie["Title"]), []).append(movie)
+    return server
+
+
+def main():
+    """
+    Parse the command line arguments and start the stub.
+    """
+    parser = argparse.ArgumentParser(description="Local stand-in for the OMDb API.")
+    parser.add_argument("fixture", nargs="?", default="data/omdb_stub.json",
+                        help="Path to a JSON list of OMDb movie responses")
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--port", type=int, default=8001)
+    args = parser.parse_args()
+
+    server = create_stub_server(args.fixture, args.host, args.port)
+    print(f"OMDb stub serving {args.fixture} on http://{args.host}:{args.port}/")
+    try:
+        server.serve_forever()
+    except KeyboardInterrupt:
+        pass
+    finally:
+        server.server_close()
+
+
+if __name__ == "__main__":
+    main()
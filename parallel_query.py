@@ -0,0 +1,305 @@
+import array
+import atexit
+import bisect
+import mmap
+import os
+import shutil
+import tempfile
+from concurrent.futures import ProcessPoolExecutor
+
+
+# Below this number of movies the work is done in the current process,
+# building the columns and starting the workers would not pay off.
+PARALLEL_THRESHOLD = 200000
+ROWS_PER_CHUNK = 50000
+
+# Column files mapped by each worker process, see _attach_columns()
+_worker_columns = {}
+
+
+class ParallelCatalog:
+    """
+    Run search and filter queries over a large catalog in a pool of worker
+    processes. The titles, years and ratings are written once into
+    memory-mapped column files which every worker maps read-only, so the
+    movies are never pickled. Each task only receives a row range and
+    returns the indices of the matching rows.
+    """
+
+    def __init__(self, movies, workers=None, rows_per_chunk=ROWS_PER_CHUNK):
+        """
+        Write the column files and start the worker processes.
+
+        :param movies: Dictionary of movies keyed by movie id.
+        :param workers: Number of worker processes, defaults to the number of CPUs.
+        :param rows_per_chunk: Number of rows handled by one task.
+        """
+        self._movies = movies
+        self._movie_ids = list(movies.keys())
+        self._rows_per_chunk = rows_per_chunk
+        self._directory = tempfile.mkdtemp(prefix="movie_columns_")
+        self._write_columns()
+        self._executor = ProcessPoolExecutor(
+            max_workers=workers or os.cpu_count(),
+            initializer=_attach_columns,
+            initargs=(self._directory,)
+        )
+
+
+    def _write_columns(self):
+        """
+        Write the lower-cased titles, their byte offsets, the years and the
+        ratings into one file per column.
+        """
+        offsets = array.array("q", [0])
+        years = array.array("q")
+        ratings = array.array("d")
+        with open(os.path.join(self._directory, "titles"), "wb") as titles_file:
+            position = 0
+            for details in self._movies.values():
+                # Titles are stored as they are, _search_chunk() drops matches spanning two titles
+                encoded_title = details["title"].lower().encode("utf-8")
+                titles_file.write(encoded_title)
+                position += len(encoded_title)
+                offsets.append(position)
+                years.append(int(details["year"]))
+                ratings.append(float(details["rating"]))
+
+        for name, column in (("offsets", offsets), ("years", years), ("ratings", ratings)):
+            with open(os.path.join(self._directory, name), "wb") as column_file:
+                column.tofile(column_file)
+
+
+    def _run(self, task_function, *arguments):
+        """
+        Run a task over every chunk of rows and merge the results in order.
+
+        :param task_function: Module-level function called as task_function(start, end, *arguments).
+        :return: Dictionary of the matching movies, in catalog order.
+        """
+        row_count = len(self._movie_ids)
+        starts = range(0, row_count, self._rows_per_chunk)
+        ends = [min(start + self._rows_per_chunk, row_count) for start in starts]
+        matching_rows = self._executor.map(
+            task_function, starts, ends, *[[argument] * len(starts) for argument in arguments]
+        )
+
+        matching_movies = {}
+        for chunk_rows in matching_rows:
+            for row in chunk_rows:
+                movie_id = self._movie_ids[row]
+                matching_movies[movie_id] = self._movies[movie_id]
+        return matching_movies
+
+
+    def search(self, search_term):
+        """
+        Find the movies whose title contains the search term, case-insensitive.
+
+        :param search_term: Part of the movie title.
+        :return: Dictionary of the matching movies, in catalog order.
+        """
+        return self._run(_search_chunk, search_term.lower().encode("utf-8"))
+
+
+    def filter(self, minimum_rating=None, start_year=None, end_year=None):
+        """
+        Find the movies matching a minimum rating and a year range.
+
+        :param minimum_rating: Minimum rating, or None for no limit.
+        :param start_year: First year, or None for no limit.
+        :param end_year: Last year, or None for no limit.
+        :return: Dictionary of the matching movies, in catalog order.
+        """
+        return self._run(_filter_chunk, minimum_rating, start_year, end_year)
+
+
+    def close(self):
+        """
+        Stop the worker processes and delete the column files.
+        """
+        self._executor.shutdown()
+        shutil.rmtree(self._directory, ignore_errors=True)
+
+
+    def __enter__(self):
+        return self
+
+
+    def __exit__(self, exc_type, exc_value, traceback):
+        self.close()
+
+
+def _attach_columns(directory):
+    """
+    Map the column files into a worker process.
+
+    :param directory: Directory containing the column files.
+    """
+    for name in ("titles", "offsets", "years", "ratings"):
+        with open(os.path.join(directory, name), "rb") as column_file:
+            if os.fstat(column_file.fileno()).st_size == 0:
+                _worker_columns[name] = b""
+                continue
+            _worker_columns[name] = mmap.mmap(column_file.fileno(), 0, access=mmap.ACCESS_READ)
+    _worker_columns["offsets_view"] = memoryview(_worker_columns["offsets"]).cast("q")
+    _worker_columns["years_view"] = memoryview(_worker_columns["years"]).cast("q")
+    _worker_columns["ratings_view"] = memoryview(_worker_columns["ratings"]).cast("d")
+
+
+def _search_chunk(start, end, encoded_term):
+    """
+    Return the rows between start and end whose title contains the encoded term.
+    """
+    if not encoded_term:
+        return list(range(start, end))
+
+    offsets = _worker_columns["offsets_view"]
+    titles = _worker_columns["titles"]
+    chunk_start = offsets[start]
+    chunk_end = offsets[end]
+    matching_rows = []
+    position = titles.find(encoded_term, chunk_start, chunk_end)
+    while position != -1:
+        row = bisect.bisect_right(offsets, position, start, end + 1) - 1
+        # A match running into the next title is not a match, and neither is
+        # any later one starting in this title
+        if position + len(encoded_term) <= offsets[row + 1]:
+            matching_rows.append(row)
+        # Continue after the matching title so each row is reported once
+        position = titles.find(encoded_term, offsets[row + 1], chunk_end)
+    return matching_rows
+
+
+def _filter_chunk(start, end, minimum_rating, start_year, end_year):
+    """
+    Return the rows between start and end matching the rating and year limits.
+    """
+    years = _worker_columns["years_view"]
+    ratings = _worker_columns["ratings_view"]
+    return [
+        row for row in range(start, end)
+        if (minimum_rating is None or ratings[row] >= minimum_rating) and
+           (start_year is None or years[row] >= start_year) and
+           (end_year is None or years[row] <= end_year)
+    ]
+
+
+class CatalogCache:
+    """
+    Keep the movies of a storage file and their ParallelCatalog between
+    queries. Parsing the file and building the columns each cost far more
+    than a query, so both are only done again when the file changes. The
+    catalog shares the cached dictionary, so the movies are held once.
+    """
+
+    def __init__(self, file_path, threshold=PARALLEL_THRESHOLD, workers=None):
+        """
+        Initialize an empty cache.
+
+        :param file_path: Path to the storage file the movies are read from, or
+                          None if there is none, which reloads the movies for
+                          every query and keeps it serial, because the cache
+                          could not be invalidated.
+        :param threshold: Minimum number of movies for the parallel execution.
+        :param workers: Number of worker processes, defaults to the number of CPUs.
+        """
+        self._file_path = file_path
+        self._threshold = threshold
+        self._workers = workers
+        self._movies = None
+        self._catalog = None
+        self._version = None
+        atexit.register(self.close)
+
+
+    def get(self, load_movies):
+        """
+        Return the movies of the storage file and their catalog. The movies
+        are only loaded if the file changed since the last call.
+
+        :param load_movies: Callable returning the dictionary of movies, e.g.
+                            IStorage.list_movies.
+        :return: Tuple of (movies, catalog). The catalog is None if there are
+                 too few movies for the parallel execution, there is only one
+                 CPU or there is no storage file.
+        """
+        if self._file_path is None:
+            return load_movies(), None
+
+        # Taken before loading, so a change during the load is seen next time.
+        # A saved file is a new inode, which tells two saves within the
+        # resolution of the modification time apart.
+        version = self._file_version()
+        if self._movies is None or version is None or version != self._version:
+            self.close()
+            self._movies = load_movies()
+            self._version = version
+            if len(self._movies) >= self._threshold and (os.cpu_count() or 1) >= 2:
+                self._catalog = ParallelCatalog(self._movies, self._workers)
+        return self._movies, self._catalog
+
+
+    def _file_version(self):
+        """
+        Return the inode, modification time and size of the storage file.
+
+        :return: Tuple, or None if the file does not exist.
+        """
+        try:
+            stat_result = os.stat(self._file_path)
+        except FileNotFoundError:
+            return None
+        return stat_result.st_ino, stat_result.st_mtime_ns, stat_result.st_size
+
+
+    def close(self):
+        """
+        Close the cached catalog, if any, and forget the cached movies.
+        """
+        if self._catalog is not None:
+            self._catalog.close()
+            self._catalog = None
+        self._movies = None
+        self._version = None
+
+
+def search_movies(movies, search_term, catalog=None):
+    """
+    Find the movies whose title contains the search term, case-insensitive.
+
+    :param movies: Dictionary of movies keyed by movie id.
+    :param search_term: Part of the movie title.
+    :param catalog: ParallelCatalog of the same movies, or None to search in this process.
+    :return: Dictionary of the matching movies, in catalog order.
+    """
+    if catalog is not None:
+        return catalog.search(search_term)
+
+    search_term = search_term.lower()
+    return {
+        movie_id: details for movie_id, details in movies.items()
+        if search_term in details["title"].lower()
+    }
+
+
+def filter_movies(movies, minimum_rating=None, start_year=None, end_year=None, catalog=None):
+    """
+    Find the movies matching a minimum rating and a year range.
+
+    :param movies: Dictionary of movies keyed by movie id.
+    :param minimum_rating: Minimum rating, or None for no limit.
+    :param start_year: First year, or None for no limit.
+    :param end_year: Last year, or None for no limit.
+    :param catalog: ParallelCatalog of the same movies, or None to filter in this process.
+    :return: Dictionary of the matching movies, in catalog order.
+    """
+    if catalog is not None:
+        return catalog.filter(minimum_rating, start_year, end_year)
+
+    return {
+        movie_id: details for movie_id, details in movies.items()
+        if (minimum_rating is None or details["rating"] >= minimum_rating) and
+           (start_year is None or details["year"] >= start_year) and
+           (end_year is None or details["year"] <= end_year)
+    }
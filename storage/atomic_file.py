@@ -0,0 +1,41 @@
+import os
+import tempfile
+from contextlib import contextmanager
+
+
+# os.umask() can only be read by setting it, so it is read once at import
+_UMASK = os.umask(0)
+os.umask(_UMASK)
+
+
+@contextmanager
+def atomic_write(file_path, mode="w", **open_arguments):
+    """
+    Open a new temporary file next to file_path for writing and let it
+    replace file_path when the block completes, so readers never see a
+    half-written file. Every call gets its own temporary file, so
+    concurrent writers of the same file cannot write into each other's
+    data; the last one to finish wins. If the block raises, the temporary
+    file is removed and file_path is left untouched.
+
+    :param file_path: Path of the file to replace.
+    :param mode: Mode to open the temporary file with, "w" or "wb".
+    :param open_arguments: Further arguments for open(), e.g. newline or encoding.
+    :return: Context manager yielding the open temporary file.
+    """
+    directory, file_name = os.path.split(file_path)
+    descriptor, temp_path = tempfile.mkstemp(prefix=f"{file_name}.", suffix=".tmp", dir=directory or ".")
+    try:
+        with open(descriptor, mode, **open_arguments) as temp_file:
+            # mkstemp() creates the file readable by the owner only
+            try:
+                permissions = os.stat(file_path).st_mode & 0o777
+            except FileNotFoundError:
+                permissions = 0o666 & ~_UMASK
+            os.chmod(temp_path, permissions)
+            yield temp_file
+        os.replace(temp_path, file_path)
+    except BaseException:
+        if os.path.exists(temp_path):
+            os.remove(temp_path)
+        raise
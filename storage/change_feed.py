@@ -0,0 +1,213 @@
+import json
+import os
+import time
+from .atomic_file import atomic_write
+
+try:
+    import fcntl
+except ImportError:
+    # Not available on Windows, where only one process may write to a feed
+    fcntl = None
+
+
+TAIL_BLOCK_SIZE = 4096
+
+EVENT_ADDED = "added"
+EVENT_DELETED = "deleted"
+EVENT_RATING_UPDATED = "rating_updated"
+EVENT_UPDATED = "updated"
+
+
+def default_change_log_path(file_path):
+    """
+    Return the path of the change log belonging to a storage file.
+
+    :param file_path: Path to the storage file.
+    :return: Path to the change log.
+    """
+    return f"{file_path}.changes.jsonl"
+
+
+class ChangeFeed:
+    """
+    Append-only log of storage changes, one JSON event per line. Every event
+    gets a sequence number one higher than the previous event in the log,
+    also when several processes write to the same log.
+
+    Each event has the keys seq, time, type and movie_id, and:
+    - added: movie, the stored details (also sent when a movie is replaced);
+    - deleted: movie, the details before the deletion;
+    - rating_updated: movie and previous_rating;
+    - updated: movie, changes (the fields whose stored value changed) and,
+      if the movie got a new id, previous_id.
+
+    Only changes that were saved are sent; an update that changes nothing
+    or that the storage refuses has no event.
+    """
+
+    def __init__(self, log_path):
+        """
+        Initialize the feed. The log file is created on the first event.
+
+        :param log_path: Path to the change log.
+        """
+        self.log_path = log_path
+
+
+    def append(self, events):
+        """
+        Number the given events and append them to the log.
+
+        :param events: List of event dictionaries without seq and time.
+        :return: The events as written, including seq and time.
+        """
+        if not events:
+            return []
+
+        with open(self.log_path, "a+b") as log_file:
+            if fcntl is not None:
+                fcntl.flock(log_file, fcntl.LOCK_EX)
+            try:
+                sequence, complete_end = self._read_tail(log_file)
+                # Drop an unfinished line left behind by a crashed writer
+                log_file.truncate(complete_end)
+                now = time.time()
+                written_events = []
+                lines = []
+                for event in events:
+                    sequence += 1
+                    written_event = {"seq": sequence, "time": now, **event}
+                    written_events.append(written_event)
+                    lines.append(json.dumps(written_event).encode("utf-8") + b"\n")
+                log_file.write(b"".join(lines))
+                log_file.flush()
+                os.fsync(log_file.fileno())
+            finally:
+                if fcntl is not None:
+                    fcntl.flock(log_file, fcntl.LOCK_UN)
+        return written_events
+
+
+    def last_sequence(self):
+        """
+        Return the sequence number of the last event in the log.
+
+        :return: Sequence number, 0 if the log is empty or missing.
+        """
+        try:
+            with open(self.log_path, "rb") as log_file:
+                return self._read_last_sequence(log_file)
+        except FileNotFoundError:
+            return 0
+
+
+    def read_since(self, sequence=0, position=0):
+        """
+        Read the events after the given sequence number.
+
+        :param sequence: Sequence number of the last event already processed.
+        :param position: Byte offset in the log to start reading at, as
+                         returned with an earlier event, to skip older events quickly.
+        :return: Iterator of (event, position after the event) tuples.
+        """
+        try:
+            log_file = open(self.log_path, "rb")
+        except FileNotFoundError:
+            return
+
+        with log_file:
+            log_file.seek(position)
+            for line in log_file:
+                # A line without newline is still being written
+                if not line.endswith(b"\n"):
+                    return
+                position += len(line)
+                event = json.loads(line)
+                if event["seq"] > sequence:
+                    yield event, position
+
+
+    def _read_last_sequence(self, log_file):
+        """
+        Read the sequence number of the last complete line of an open log file.
+        """
+        return self._read_tail(log_file)[0]
+
+
+    def _read_tail(self, log_file):
+        """
+        Find the last complete line of an open log file.
+
+        :return: Tuple of (sequence number of the last event, byte offset
+                 after the last complete line).
+        """
+        log_file.seek(0, os.SEEK_END)
+        end = log_file.tell()
+        tail = b""
+        while end > 0:
+            start = max(0, end - TAIL_BLOCK_SIZE)
+            log_file.seek(start)
+            tail = log_file.read(end - start) + tail
+            end = start
+            # The part after the last newline is empty or an unfinished line
+            complete_lines = tail.split(b"\n")[:-1]
+            if len(complete_lines) > 1 or (start == 0 and complete_lines):
+                complete_end = start + tail.rindex(b"\n") + 1
+                return json.loads(complete_lines[-1])["seq"], complete_end
+        return 0, 0
+
+
+class ChangeFeedConsumer:
+    """
+    Process the events of a change feed that a subscriber has not seen yet.
+    The subscriber's position is kept in its own checkpoint file, so it can
+    stop at any time and continue from there.
+    """
+
+    def __init__(self, feed, checkpoint_path):
+        """
+        Initialize the consumer and load its checkpoint.
+
+        :param feed: The ChangeFeed to read.
+        :param checkpoint_path: Path to the checkpoint file of this subscriber.
+        """
+        self.feed = feed
+        self.checkpoint_path = checkpoint_path
+        self.sequence = 0
+        self._position = 0
+        if os.path.exists(checkpoint_path):
+            with open(checkpoint_path, "r") as checkpoint_file:
+                checkpoint = json.load(checkpoint_file)
+            self.sequence = checkpoint["seq"]
+            self._position = checkpoint["position"]
+
+
+    def poll(self, handler, batch_size=1000):
+        """
+        Call the handler for every new event, in order. The checkpoint is
+        saved after every batch, so an event may be handled again after a
+        crash but is never skipped.
+
+        :param handler: Callable taking one event dictionary.
+        :param batch_size: Number of events between two checkpoint saves.
+        :return: Number of handled events.
+        """
+        handled = 0
+        for event, position in self.feed.read_since(self.sequence, self._position):
+            handler(event)
+            self.sequence = event["seq"]
+            self._position = position
+            handled += 1
+            if handled % batch_size == 0:
+                self.save()
+        if handled % batch_size:
+            self.save()
+        return handled
+
+
+    def save(self):
+        """
+        Write the checkpoint file through a temporary file.
+        """
+        with atomic_write(self.checkpoint_path) as checkpoint_file:
+            json.dump({"seq": self.sequence, "position": self._position}, checkpoint_file)
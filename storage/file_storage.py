@@ -0,0 +1,276 @@
+import os
+from abc import abstractmethod
+from .change_feed import EVENT_ADDED, EVENT_DELETED, EVENT_RATING_UPDATED, EVENT_UPDATED
+from .istorage import IStorage
+from .movie_index import MovieIndex, build_movie, deduplicate_movies, make_local_id
+
+
+class FileStorage(IStorage):
+    """
+    Base class for storages keeping all movies in one file. The movie logic
+    lives here; a subclass only reads and writes its file format by
+    implementing write_default_data(), _load(), _read_movies() and _save_movies().
+    """
+
+    def __init__(self, file_path, change_feed=None):
+        """
+        Initialize the storage with the given file path.
+
+        :param file_path: Path to the storage file.
+        :param change_feed: Optional ChangeFeed that receives an event for every change.
+        """
+        self.file_path = file_path
+        self.change_feed = change_feed
+        # Built on the first title lookup, with the file version it reflects
+        self._title_index = None
+        self._title_index_version = None
+
+
+    def validate_existence(self):
+        """
+        Validate if the storage file exists.
+
+        :return: True if file exists, False otherwise.
+        """
+        try:
+            with open(self.file_path, "r"):
+                return True
+        except FileNotFoundError:
+            print("File does not exist, creating default data")
+            self.write_default_data()
+            return False
+
+
+    def validate_data(self) -> bool:
+        """
+        Validate the data in the storage file.
+
+        :return: True if data is valid, False otherwise.
+        """
+        return len(self._load()) >= 1
+
+
+    @abstractmethod
+    def write_default_data(self):
+        """
+        Write default data to the storage file.
+        """
+
+
+    def list_movies(self):
+        """
+        List all movies from the storage file.
+
+        :return: Dictionary of movies keyed by movie id (the imdbID when known).
+        """
+        movies = {}
+        for movie_id, details in self._load():
+            movies[movie_id] = details
+        return movies
+
+
+    def iter_movies(self):
+        """
+        Iterate over the movies in the storage file in a single pass, holding
+        one movie in memory at a time. The storage never writes two rows with
+        the same movie id, so the rows only differ from list_movies() in a
+        file edited by hand; deduplicate() merges those rows.
+
+        :return: Iterator of (movie_id, details) tuples.
+        """
+        if self.validate_existence():
+            yield from self._read_movies()
+
+
+    def find_movie_ids(self, title):
+        """
+        Find the ids of all movies with the given title, ignoring case,
+        accents and extra whitespace. The title index is built on the first
+        lookup and then kept up to date with the changes made through this
+        storage; it is only rebuilt when another process changed the file.
+
+        :param title: Title to look up.
+        :return: List of movie ids, empty if there is no match.
+        """
+        if self._title_index is None or self._title_index_version != self._file_version():
+            if not self.validate_existence():
+                return []
+            title_index = MovieIndex()
+            for movie_id, details in self._read_movies():
+                title_index.add(movie_id, details["title"])
+            self._title_index = title_index
+            self._title_index_version = self._file_version()
+        return self._title_index.find(title)
+
+
+    def add_movie(self, title, year, rating, poster, imdb_id=None):
+        """
+        Add a new movie to the storage file. A movie with the same id is replaced,
+        and so is a movie without imdbID with the same normalized title and
+        year when imdb_id is given, like deduplicate_movies() does.
+
+        :param title: Title of the movie.
+        :param year: Release year of the movie.
+        :param rating: Rating of the movie.
+        :param poster: Poster URL of the movie.
+        :param imdb_id: IMDb id of the movie, if known.
+        :return: Id of the added movie.
+        """
+        movies = self.list_movies()
+        movie_id, details = build_movie(title, year, rating, poster, imdb_id)
+        events = []
+        local_id = make_local_id(details)
+        if imdb_id and local_id in movies:
+            events.append({"type": EVENT_DELETED, "movie_id": local_id, "movie": movies.pop(local_id)})
+        movies[movie_id] = details
+        self._save_movies(movies)
+        events.append({"type": EVENT_ADDED, "movie_id": movie_id, "movie": details})
+        self._emit(events)
+        return movie_id
+
+
+    def delete_movie(self, movie_id):
+        """
+        Delete a movie from the storage file.
+
+        :param movie_id: Id of the movie to delete.
+        """
+        movies = self.list_movies()
+        if movie_id in movies:
+            details = movies.pop(movie_id)
+            self._save_movies(movies)
+            self._emit([{"type": EVENT_DELETED, "movie_id": movie_id, "movie": details}])
+
+
+    def update_movie(self, movie_id, rating):
+        """
+        Update the rating of an existing movie in the storage file.
+
+        :param movie_id: Id of the movie to update.
+        :param rating: New rating of the movie.
+        """
+        movies = self.list_movies()
+        if movie_id in movies:
+            previous_rating = movies[movie_id]["rating"]
+            movies[movie_id]["rating"] = rating
+            self._save_movies(movies)
+            self._emit([{"type": EVENT_RATING_UPDATED, "movie_id": movie_id,
+                         "movie": movies[movie_id], "previous_rating": previous_rating}])
+
+
+    def update_movies(self, updates):
+        """
+        Update several movies in the storage file with a single write.
+        A movie that gets an imdb_id is stored under that id from then on,
+        unless another movie already has that id; such an update is not
+        applied, so neither movie is overwritten.
+
+        :param updates: Dictionary mapping movie ids to the changed fields,
+                        e.g. {"tt0120338": {"rating": 7.9, "poster": "..."}}.
+        :return: List of the ids of the movies that were not updated because
+                 their new id belongs to another movie.
+        """
+        movies = self.list_movies()
+        updated_movies = {}
+        rejected_ids = []
+        events = []
+        for movie_id, details in movies.items():
+            if movie_id in updates:
+                previous_id = movie_id
+                merged = {**details, **updates[movie_id]}
+                new_id, new_details = build_movie(merged["title"], merged["year"], merged["rating"],
+                                                  merged["poster"], merged["imdb_id"])
+                # The event lists what really changed in the saved record
+                changes = {field: value for field, value in new_details.items() if details[field] != value}
+                if new_id != previous_id and (new_id in movies or new_id in updated_movies):
+                    rejected_ids.append(previous_id)
+                elif changes:
+                    movie_id, details = new_id, new_details
+                    event = {"type": EVENT_UPDATED, "movie_id": movie_id, "movie": details,
+                             "changes": changes}
+                    if movie_id != previous_id:
+                        event["previous_id"] = previous_id
+                    events.append(event)
+            updated_movies[movie_id] = details
+        if events:
+            self._save_movies(updated_movies)
+            self._emit(events)
+        return rejected_ids
+
+
+    def deduplicate(self):
+        """
+        Remove duplicate movies from the storage file, see deduplicate_movies().
+
+        :return: Number of removed duplicates.
+        """
+        movie_items = self._load()
+        if not movie_items:
+            return 0
+        movies, duplicates = deduplicate_movies(movie_items)
+        if duplicates:
+            previous_movies = dict(movie_items)
+            self._save_movies(movies)
+            self._emit([
+                {"type": EVENT_DELETED, "movie_id": movie_id, "movie": details}
+                for movie_id, details in previous_movies.items() if movie_id not in movies
+            ])
+        return duplicates
+
+
+    def _emit(self, events):
+        """
+        Apply change events to the title index, if it was built, and send
+        them to the change feed, if there is one.
+
+        :param events: List of event dictionaries, see ChangeFeed.
+        """
+        if self._title_index is not None:
+            for event in events:
+                self._title_index.apply_event(event)
+            self._title_index_version = self._file_version()
+        if self.change_feed is not None:
+            self.change_feed.append(events)
+
+
+    def _file_version(self):
+        """
+        Return the modification time and size of the storage file, which
+        change whenever the file is replaced.
+
+        :return: Tuple of (mtime in nanoseconds, size), None if the file is missing.
+        """
+        try:
+            stat = os.stat(self.file_path)
+        except FileNotFoundError:
+            return None
+        return stat.st_mtime_ns, stat.st_size
+
+
+    @abstractmethod
+    def _load(self):
+        """
+        Read the whole storage file in one go, writing default data if it
+        is missing or corrupted.
+
+        :return: List of (movie_id, details) tuples, duplicates included,
+                 empty if the file was missing or corrupted.
+        """
+
+
+    @abstractmethod
+    def _read_movies(self):
+        """
+        Read the movies from the storage file one at a time.
+
+        :return: Iterator of (movie_id, details) tuples, duplicates included.
+        """
+
+
+    @abstractmethod
+    def _save_movies(self, movies):
+        """
+        Save movies to the storage file, replacing its content.
+
+        :param movies: Dictionary of movies to save.
+        """
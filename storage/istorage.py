@@ -6,13 +6,29 @@ class IStorage(ABC):
         pass
 
     @abstractmethod
-    def add_movie(self, title, year, rating, poster):
+    def iter_movies(self):
         pass
 
     @abstractmethod
-    def delete_movie(self, title):
+    def find_movie_ids(self, title):
         pass
 
     @abstractmethod
-    def update_movie(self, title, rating):
+    def add_movie(self, title, year, rating, poster, imdb_id=None):
+        pass
+
+    @abstractmethod
+    def delete_movie(self, movie_id):
+        pass
+
+    @abstractmethod
+    def update_movie(self, movie_id, rating):
+        pass
+
+    @abstractmethod
+    def update_movies(self, updates):
+        pass
+
+    @abstractmethod
+    def deduplicate(self):
         pass
@@ -0,0 +1,166 @@
+import hashlib
+import unicodedata
+from .change_feed import EVENT_ADDED, EVENT_DELETED, EVENT_UPDATED
+
+
+LOCAL_ID_PREFIX = "local-"
+
+
+def normalize_title(title):
+    """
+    Normalize a title so that case, accent and whitespace variants compare equal,
+    e.g. "  Amélie " and "AMELIE" both become "amelie".
+
+    :param title: Title of the movie.
+    :return: Case-folded title without accents and with single spaces.
+    """
+    if title.isascii():
+        # Nothing to decompose, and casefold() equals lower() for ASCII
+        return " ".join(title.lower().split())
+    decomposed = unicodedata.normalize("NFKD", title)
+    without_accents = "".join(char for char in decomposed if not unicodedata.combining(char))
+    return " ".join(without_accents.casefold().split())
+
+
+def make_movie_id(title, year, imdb_id=None):
+    """
+    Return the primary key of a movie. This is the imdbID when it is known,
+    otherwise a stable local id derived from the normalized title and year,
+    so variants of the same title in old data map to the same record.
+
+    :param title: Title of the movie.
+    :param year: Release year of the movie.
+    :param imdb_id: IMDb id from the OMDb API, e.g. "tt0120338", if known.
+    :return: Movie id string.
+    """
+    if imdb_id:
+        return imdb_id
+    key = f"{normalize_title(title)}|{year}".encode("utf-8")
+    return LOCAL_ID_PREFIX + hashlib.blake2b(key, digest_size=8).hexdigest()
+
+
+def make_local_id(details):
+    """
+    Return the id a movie has, or would have, without an imdbID. A movie
+    without imdbID is a duplicate of a movie with an imdbID whose local
+    id is its own id.
+
+    :param details: Movie details with title and year.
+    :return: Local movie id string.
+    """
+    return make_movie_id(details["title"], details["year"])
+
+
+def build_movie(title, year, rating, poster="", imdb_id=None):
+    """
+    Build a movie record in the form returned by IStorage.list_movies().
+
+    :param title: Title of the movie.
+    :param year: Release year of the movie.
+    :param rating: Rating of the movie.
+    :param poster: Poster URL of the movie.
+    :param imdb_id: IMDb id of the movie, if known.
+    :return: Tuple of (movie_id, details).
+    """
+    imdb_id = imdb_id or ""
+    details = {"title": title.strip(), "year": year, "rating": rating,
+               "poster": poster or "", "imdb_id": imdb_id}
+    return make_movie_id(title, year, imdb_id), details
+
+
+class MovieIndex:
+    """
+    Secondary index from normalized titles to movie ids.
+    """
+
+    def __init__(self, movies=None):
+        """
+        Initialize the index, optionally from a dictionary of movies.
+
+        :param movies: Dictionary of movies keyed by movie id.
+        """
+        self._ids_by_title = {}
+        for movie_id, details in (movies or {}).items():
+            self.add(movie_id, details["title"])
+
+
+    def add(self, movie_id, title):
+        """
+        Add a movie to the index.
+
+        :param movie_id: Id of the movie.
+        :param title: Title of the movie.
+        """
+        movie_ids = self._ids_by_title.setdefault(normalize_title(title), [])
+        if movie_id not in movie_ids:
+            movie_ids.append(movie_id)
+
+
+    def remove(self, movie_id, title):
+        """
+        Remove a movie from the index.
+
+        :param movie_id: Id of the movie.
+        :param title: Title of the movie.
+        """
+        normalized_title = normalize_title(title)
+        movie_ids = self._ids_by_title.get(normalized_title, [])
+        if movie_id in movie_ids:
+            movie_ids.remove(movie_id)
+        if not movie_ids:
+            self._ids_by_title.pop(normalized_title, None)
+
+
+    def apply_event(self, event):
+        """
+        Update the index from a change feed event, so it can follow the
+        storage without being rebuilt.
+
+        :param event: Event dictionary, see ChangeFeed.
+        """
+        if event["type"] == EVENT_DELETED:
+            self.remove(event["movie_id"], event["movie"]["title"])
+        elif event["type"] in (EVENT_ADDED, EVENT_UPDATED):
+            if "previous_id" in event:
+                self.remove(event["previous_id"], event["movie"]["title"])
+            self.add(event["movie_id"], event["movie"]["title"])
+
+
+    def find(self, title):
+        """
+        Find the ids of all movies with the given title, ignoring case,
+        accents and extra whitespace.
+
+        :param title: Title to look up.
+        :return: List of movie ids, empty if there is no match.
+        """
+        return list(self._ids_by_title.get(normalize_title(title), []))
+
+
+def deduplicate_movies(movie_items):
+    """
+    Remove duplicate movies in linear time by looking up hashed keys
+    instead of comparing every pair of movies:
+
+    - records with the same id are merged, keeping the last one;
+    - records without an imdbID are merged into a record with an imdbID
+      that has the same normalized title and year, see make_local_id().
+
+    :param movie_items: Iterable of (movie_id, details) tuples.
+    :return: Tuple of (dictionary of unique movies, number of removed duplicates).
+    """
+    movies = {}
+    duplicates = 0
+    for movie_id, details in movie_items:
+        if movie_id in movies:
+            duplicates += 1
+        movies[movie_id] = details
+
+    imdb_local_ids = {make_local_id(details) for details in movies.values() if details.get("imdb_id")}
+    unique_movies = {}
+    for movie_id, details in movies.items():
+        if not details.get("imdb_id") and movie_id in imdb_local_ids:
+            duplicates += 1
+            continue
+        unique_movies[movie_id] = details
+    return unique_movies, duplicates
@@ -1,54 +1,22 @@
 import csv
-from .istorage import IStorage
+from .atomic_file import atomic_write
+from .file_storage import FileStorage
+from .movie_index import build_movie
 
 
-class StorageCsv(IStorage):
+class StorageCsv(FileStorage):
     """
     A class to represent storage for movies using CSV format.
     """
 
-    def __init__(self, file_path='data/movies.csv'):
+    def __init__(self, file_path='data/movies.csv', change_feed=None):
         """
         Initialize the StorageCsv with the given file path.
 
         :param file_path: Path to the CSV file.
+        :param change_feed: Optional ChangeFeed that receives an event for every change.
         """
-        self.file_path = file_path
-
-
-    def validate_existence(self):
-        """
-        Validate if the CSV file exists.
-
-        :return: True if file exists, False otherwise.
-        """
-        try:
-            with open(self.file_path, "r"):
-                return True
-        except FileNotFoundError:
-            print("File does not exist, creating default data")
-            self.write_default_data()
-            return False
-
-
-    def validate_data(self) -> bool:
-        """
-        Validate the data in the CSV file.
-
-        :return: True if data is valid, False otherwise.
-        """
-        if self.validate_existence():
-            try:
-                with open(self.file_path, "r") as csv_file:
-                    reader = csv.DictReader(csv_file)
-                    data = list(reader)
-                    if len(data) >= 1:
-                        return True
-            except Exception as e:
-                print(f"Error reading CSV file: {e}")
-                self.write_default_data()
-                return False
-        return False
+        super().__init__(file_path, change_feed)
 
 
     def write_default_data(self):
@@ -65,73 +33,67 @@ class StorageCsv(IStorage):
             writer.writerows(default_data)
 
 
-    def list_movies(self):
+    def _load(self):
         """
-        List all movies from the CSV file.
+        Read the whole CSV file, writing default data if it is missing or unreadable.
 
-        :return: Dictionary of movies.
-        """
-        movies = {}
-        if self.validate_data():
-            with open(self.file_path, "r") as csv_file:
-                reader = csv.DictReader(csv_file)
-                for row in reader:
-                    title = row["title"]
-                    movies[title] = {
-                        "year": int(row["year"]),
-                        "rating": float(row["rating"]),
-                        "poster": row.get("poster", "")
-                    }
-        return movies
-
-    def add_movie(self, title, year, rating, poster):
+        :return: List of (movie_id, details) tuples, duplicates included,
+                 empty if the file was missing or unreadable.
         """
-        Add a new movie to the CSV file.
-
-        :param title: Title of the movie.
-        :param year: Release year of the movie.
-        :param rating: Rating of the movie.
-        :param poster: Poster URL of the movie.
-        """
-        movies = self.list_movies()
-        movies[title] = {"year": year, "rating": rating, "poster": poster}
-        self._save_movies(movies)
+        if not self.validate_existence():
+            return []
+        try:
+            with open(self.file_path, "r", newline='') as csv_file:
+                rows = list(csv.DictReader(csv_file))
+        except Exception as e:
+            print(f"Error reading CSV file: {e}")
+            self.write_default_data()
+            return []
+        return [self._parse_row(row) for row in rows]
 
 
-    def delete_movie(self, title):
+    def _read_movies(self):
         """
-        Delete a movie from the CSV file.
+        Read the movies from the CSV file one row at a time.
 
-        :param title: Title of the movie to delete.
+        :return: Iterator of (movie_id, details) tuples, duplicates included.
         """
-        movies = self.list_movies()
-        if title in movies:
-            del movies[title]
-            self._save_movies(movies)
+        with open(self.file_path, "r", newline='') as csv_file:
+            reader = csv.DictReader(csv_file)
+            for row in reader:
+                yield self._parse_row(row)
+
 
-    def update_movie(self, title, rating):
+    def _parse_row(self, row):
         """
-        Update the rating of an existing movie in the CSV file.
+        Build a movie record from a row of the CSV file.
 
-        :param title: Title of the movie to update.
-        :param rating: New rating of the movie.
+        :param row: Row dictionary as read by csv.DictReader.
+        :return: Tuple of (movie_id, details).
         """
-        movies = self.list_movies()
-        if title in movies:
-            movies[title]["rating"] = rating
-            self._save_movies(movies)
+        return build_movie(
+            row["title"],
+            int(row["year"]),
+            float(row["rating"]),
+            row.get("poster") or "",
+            row.get("imdb_id")
+        )
+
 
     def _save_movies(self, movies):
         """
         Save movies to the CSV file.
 
+        The rows are written to a temporary file which then replaces the
+        original, so concurrent readers never see a half-written file.
+
         :param movies: Dictionary of movies to save.
         """
-        with open(self.file_path, "w", newline='') as csv_file:
-            fieldnames = ["title", "year", "rating", "poster"]
+        with atomic_write(self.file_path, "w", newline='') as csv_file:
+            fieldnames = ["title", "year", "rating", "poster", "imdb_id"]
             writer = csv.DictWriter(csv_file, fieldnames=fieldnames)
             writer.writeheader()
-            for title, details in movies.items():
-                row = {"title": title, "year": details["year"], "rating": details["rating"],
-                       "poster": details["poster"]}
+            for details in movies.values():
+                row = {"title": details["title"], "year": details["year"], "rating": details["rating"],
+                       "poster": details["poster"], "imdb_id": details.get("imdb_id", "")}
                 writer.writerow(row)
@@ -0,0 +1,32 @@
+import os
+from .change_feed import ChangeFeed, default_change_log_path
+from .storage_csv import StorageCsv
+from .storage_json import StorageJson
+
+
+STORAGE_CLASSES = {
+    ".csv": StorageCsv,
+    ".json": StorageJson,
+}
+
+
+def create_storage(file_path, change_log_path=None, with_change_feed=True):
+    """
+    Create the storage matching the extension of the given file path.
+    Changes made through the storage are recorded in its change feed.
+
+    :param file_path: Path to a .csv or .json movie file.
+    :param change_log_path: Path to the change log, defaults to the file path with '.changes.jsonl' appended.
+    :param with_change_feed: Set to False to not record changes.
+    :return: An instance of a storage class that implements IStorage.
+    :raises ValueError: If the file extension is not supported.
+    """
+    extension = os.path.splitext(file_path)[1].lower()
+    if extension not in STORAGE_CLASSES:
+        supported = ", ".join(sorted(STORAGE_CLASSES))
+        raise ValueError(f"Unsupported storage file '{file_path}', expected one of: {supported}")
+
+    change_feed = None
+    if with_change_feed:
+        change_feed = ChangeFeed(change_log_path or default_change_log_path(file_path))
+    return STORAGE_CLASSES[extension](file_path, change_feed)
@@ -1,53 +1,23 @@
 import json
-from .istorage import IStorage
+from .atomic_file import atomic_write
+from .file_storage import FileStorage
+from .movie_index import build_movie
+from .streaming import iter_json_rows
 
 
-class StorageJson(IStorage):
+class StorageJson(FileStorage):
     """
     A class to represent storage for movies using JSON format.
     """
 
-    def __init__(self, file_path='data/movies.json'):
+    def __init__(self, file_path='data/movies.json', change_feed=None):
         """
         Initialize the StorageJson with the given file path.
 
         :param file_path: Path to the JSON file.
+        :param change_feed: Optional ChangeFeed that receives an event for every change.
         """
-        self.file_path = file_path
-
-
-    def validate_existence(self):
-        """
-        Validate if the JSON file exists.
-
-        :return: True if file exists, False otherwise.
-        """
-        try:
-            with open(self.file_path, "r"):
-                return True
-        except FileNotFoundError:
-            print("File does not exist, creating default data")
-            self.write_default_data()
-            return False
-
-
-    def validate_data(self) -> bool:
-        """
-        Validate the data in the JSON file.
-
-        :return: True if data is valid, False otherwise.
-        """
-        if self.validate_existence():
-            try:
-                with open(self.file_path, "r") as json_file:
-                    data = json.load(json_file)
-                    if len(data) >= 1:
-                        return True
-            except json.decoder.JSONDecodeError:
-                print("File data missing or corrupted, creating default data")
-                self.write_default_data()
-                return False
-        return False
+        super().__init__(file_path, change_feed)
 
 
     def write_default_data(self):
@@ -63,72 +33,64 @@ class StorageJson(IStorage):
             json.dump(default_data, file_writer, indent=4)
 
 
-    def list_movies(self):
+    def _load(self):
         """
-        List all movies from the JSON file.
+        Load the whole JSON file with a single json.load, which is faster
+        than streaming when all movies are kept anyway. Default data is
+        written if the file is missing or corrupted.
 
-        :return: Dictionary of movies.
+        :return: List of (movie_id, details) tuples, duplicates included,
+                 empty if the file was missing or corrupted.
         """
-        movies = {}
-        if self.validate_data():
+        if not self.validate_existence():
+            return []
+        try:
             with open(self.file_path, "r") as json_file:
                 data = json.load(json_file)
-                for movie in data:
-                    title = movie["title"]
-                    movies[title] = {
-                        "year": movie["year"],
-                        "rating": movie["rating"],
-                        "poster": movie.get("poster", "")
-                    }
-        return movies
-
-
-    def add_movie(self, title, year, rating, poster):
-        """
-        Add a new movie to the JSON file.
-
-        :param title: Title of the movie.
-        :param year: Release year of the movie.
-        :param rating: Rating of the movie.
-        :param poster: Poster URL of the movie.
-        """
-        movies = self.list_movies()
-        movies[title] = {"year": year, "rating": rating, "poster": poster}
-        self._save_movies(movies)
+        except json.decoder.JSONDecodeError:
+            print("File data missing or corrupted, creating default data")
+            self.write_default_data()
+            return []
+        return [self._parse_movie(movie) for movie in data]
 
 
-    def delete_movie(self, title):
+    def _read_movies(self):
         """
-        Delete a movie from the JSON file.
+        Read the movies from the JSON file one at a time.
 
-        :param title: Title of the movie to delete.
+        :return: Iterator of (movie_id, details) tuples, duplicates included.
         """
-        movies = self.list_movies()
-        if title in movies:
-            del movies[title]
-            self._save_movies(movies)
+        for movie in iter_json_rows(self.file_path):
+            yield self._parse_movie(movie)
 
 
-    def update_movie(self, title, rating):
+    def _parse_movie(self, movie):
         """
-        Update the rating of an existing movie in the JSON file.
+        Build a movie record from a movie dictionary of the JSON file.
 
-        :param title: Title of the movie to update.
-        :param rating: New rating of the movie.
+        :param movie: Movie dictionary as stored in the file.
+        :return: Tuple of (movie_id, details).
         """
-        movies = self.list_movies()
-        if title in movies:
-            movies[title]["rating"] = rating
-            self._save_movies(movies)
+        return build_movie(
+            movie["title"],
+            movie["year"],
+            movie["rating"],
+            movie.get("poster", ""),
+            movie.get("imdb_id")
+        )
 
 
     def _save_movies(self, movies):
         """
         Save movies to the JSON file.
 
+        The data is written to a temporary file which then replaces the
+        original, so concurrent readers never see a half-written file.
+
         :param movies: Dictionary of movies to save.
         """
-        data = [{"title": title, "year": details["year"], "rating": details["rating"], "poster": details.get("poster", "")}
-                for title, details in movies.items()]
-        with open(self.file_path, "w") as json_file:
+        data = [{"title": details["title"], "year": details["year"], "rating": details["rating"],
+                 "poster": details.get("poster", ""), "imdb_id": details.get("imdb_id", "")}
+                for details in movies.values()]
+        with atomic_write(self.file_path) as json_file:
             json.dump(data, json_file, indent=4)
@@ -0,0 +1,225 @@
+import csv
+import json
+import os
+from .movie_index import build_movie
+
+
+READ_BLOCK_SIZE = 64 * 1024
+
+
+def parse_movie_row(row):
+    """
+    Validate a raw movie row and convert it to the (movie_id, details) form
+    used by IStorage.list_movies().
+
+    :param row: Dictionary with title, year, rating and optionally poster and imdb_id.
+    :return: Tuple of (movie_id, details).
+    :raises ValueError: If the row is missing a title or has an invalid year or rating.
+    """
+    title = (row.get("title") or "").strip()
+    if not title:
+        raise ValueError("Movie row has no title")
+    try:
+        year = int(row["year"])
+        rating = float(row["rating"])
+    except (KeyError, TypeError, ValueError):
+        raise ValueError(f"Movie '{title}' has an invalid year or rating")
+    return build_movie(title, year, rating, row.get("poster"), row.get("imdb_id"))
+
+
+def iter_csv_rows(file_path):
+    """
+    Read raw rows from a movie CSV file one at a time.
+
+    :param file_path: Path to the CSV file.
+    :return: Iterator of row dictionaries.
+    """
+    with open(file_path, "r", newline='') as csv_file:
+        yield from csv.DictReader(csv_file)
+
+
+def iter_json_rows(file_path):
+    """
+    Read raw rows from a movie JSON file one at a time, without loading
+    the whole array into memory.
+
+    :param file_path: Path to the JSON file containing a list of movie objects.
+    :return: Iterator of row dictionaries.
+    :raises ValueError: If the file does not contain a JSON array.
+    """
+    decoder = json.JSONDecoder()
+    with open(file_path, "r") as json_file:
+        buffer = json_file.read(READ_BLOCK_SIZE).lstrip()
+        if not buffer.startswith("["):
+            raise ValueError(f"{file_path} does not contain a JSON array")
+        position = 1
+        end_of_file = False
+
+        while True:
+            # Skip the separators between two array items
+            while position < len(buffer) and buffer[position] in " \t\r\n,":
+                position += 1
+            if position < len(buffer) and buffer[position] == "]":
+                return
+
+            try:
+                if position >= len(buffer):
+                    raise json.JSONDecodeError("Need more data", buffer, position)
+                row, position = decoder.raw_decode(buffer, position)
+            except json.JSONDecodeError:
+                if end_of_file:
+                    raise ValueError(f"{file_path} ends with an incomplete JSON array")
+                block = json_file.read(READ_BLOCK_SIZE)
+                end_of_file = block == ""
+                buffer = buffer[position:] + block
+                position = 0
+                continue
+            yield row
+
+
+def iter_file_rows(file_path):
+    """
+    Read raw rows from a movie file, picking the reader from the extension.
+
+    :param file_path: Path to a .csv or .json movie file.
+    :return: Iterator of row dictionaries.
+    :raises ValueError: If the file extension is not supported.
+    """
+    extension = os.path.splitext(file_path)[1].lower()
+    if extension == ".csv":
+        return iter_csv_rows(file_path)
+    if extension == ".json":
+        return iter_json_rows(file_path)
+    raise ValueError(f"Unsupported movie file '{file_path}', expected .csv or .json")
+
+
+class CsvMovieWriter:
+    """
+    Append movies to a CSV file in the format read by StorageCsv.
+    """
+
+    fieldnames = ["title", "year", "rating", "poster", "imdb_id"]
+
+    def __init__(self, file_path, offset=0, rows_written=0):
+        """
+        Open the CSV file for writing.
+
+        :param file_path: Path to the CSV file.
+        :param offset: Byte offset to resume from, 0 starts a new file.
+        :param rows_written: Number of movies already in the file before the offset.
+        """
+        self.file_path = file_path
+        self.rows_written = rows_written
+        if offset:
+            os.truncate(file_path, offset)
+            self._file = open(file_path, "a", newline='')
+        else:
+            self._file = open(file_path, "w", newline='')
+        self._writer = csv.DictWriter(self._file, fieldnames=self.fieldnames)
+        if not offset:
+            self._writer.writeheader()
+
+
+    def write(self, details):
+        """
+        Write one movie.
+
+        :param details: Dictionary with title, year, rating, poster and imdb_id.
+        """
+        self._writer.writerow({"title": details["title"], "year": details["year"],
+                               "rating": details["rating"], "poster": details.get("poster", ""),
+                               "imdb_id": details.get("imdb_id", "")})
+        self.rows_written += 1
+
+
+    def flush(self):
+        """
+        Flush the written movies to disk.
+
+        :return: Byte offset up to which the file is complete.
+        """
+        self._file.flush()
+        os.fsync(self._file.fileno())
+        return self._file.tell()
+
+
+    def close(self):
+        """
+        Flush and close the file.
+        """
+        self.flush()
+        self._file.close()
+
+
+class JsonMovieWriter:
+    """
+    Append movies to a JSON array file in the format read by StorageJson.
+    """
+
+    def __init__(self, file_path, offset=0, rows_written=0):
+        """
+        Open the JSON file for writing.
+
+        :param file_path: Path to the JSON file.
+        :param offset: Byte offset to resume from, 0 starts a new file.
+        :param rows_written: Number of movies already in the file before the offset.
+        """
+        self.file_path = file_path
+        self.rows_written = rows_written
+        if offset:
+            os.truncate(file_path, offset)
+            self._file = open(file_path, "a")
+        else:
+            self._file = open(file_path, "w")
+            self._file.write("[")
+
+
+    def write(self, details):
+        """
+        Write one movie.
+
+        :param details: Dictionary with title, year, rating, poster and imdb_id.
+        """
+        movie = {"title": details["title"], "year": details["year"], "rating": details["rating"],
+                 "poster": details.get("poster", ""), "imdb_id": details.get("imdb_id", "")}
+        separator = ",\n    " if self.rows_written else "\n    "
+        self._file.write(separator + json.dumps(movie))
+        self.rows_written += 1
+
+
+    def flush(self):
+        """
+        Flush the written movies to disk.
+
+        :return: Byte offset up to which the file is complete.
+        """
+        self._file.flush()
+        os.fsync(self._file.fileno())
+        return self._file.tell()
+
+
+    def close(self):
+        """
+        Close the JSON array, then flush and close the file.
+        """
+        self._file.write("\n]\n")
+        self.flush()
+        self._file.close()
+
+
+def create_movie_writer(file_path, offset=0, rows_written=0):
+    """
+    Create the writer matching the extension of the given file path.
+
+    :param file_path: Path to a .csv or .json movie file.
+    :param offset: Byte offset to resume from, 0 starts a new file.
+    :param rows_written: Number of movies already in the file before the offset.
+    :return: A CsvMovieWriter or JsonMovieWriter.
+    :raises ValueError: If the file extension is not supported.
+    """
+    extension = os.path.splitext(file_path)[1].lower()
+    if extension == ".csv":
+        return CsvMovieWriter(file_path, offset, rows_written)
+    if extension == ".json":
+        return JsonMovieWriter(file_path, offset, rows_written)
+    raise ValueError(f"Unsupported movie file '{file_path}', expected .csv or .json")
@@ -0,0 +1,351 @@
+import argparse
+import hashlib
+import itertools
+import os
+import sqlite3
+import sys
+import time
+
+from storage.istorage import IStorage
+from storage.movie_index import make_local_id
+from storage.streaming import create_movie_writer, iter_file_rows, parse_movie_row
+
+
+DEFAULT_CHUNK_SIZE = 10000
+# Below the default limit of 999 parameters per statement of older SQLite versions
+SQLITE_BATCH_SIZE = 500
+
+
+class MigrationState:
+    """
+    Persist the progress of a conversion in a small SQLite file, so an
+    interrupted conversion can be resumed. The duplicate index built in the
+    first pass over the source is kept on disk as fixed-size hashes, which
+    keeps memory use constant.
+    """
+
+    source_fields = ["source_path", "source_size", "source_mtime_ns"]
+    checkpoint_fields = source_fields + ["indexed_rows", "index_complete", "source_rows", "target_offset",
+                                         "rows_written", "duplicates", "invalid"]
+
+    def __init__(self, state_path):
+        """
+        Open or create the state file.
+
+        :param state_path: Path to the SQLite state file.
+        """
+        self.state_path = state_path
+        self._connection = sqlite3.connect(state_path, isolation_level=None)
+        # Number of the last source row of every movie id
+        self._connection.execute(
+            "CREATE TABLE IF NOT EXISTS last_rows (id_hash BLOB PRIMARY KEY, source_row INTEGER)"
+        )
+        # Local ids of the movies with an imdbID, see make_local_id()
+        self._connection.execute("CREATE TABLE IF NOT EXISTS imdb_local_ids (id_hash BLOB PRIMARY KEY)")
+        self._connection.execute(
+            "CREATE TABLE IF NOT EXISTS checkpoint ("
+            "id INTEGER PRIMARY KEY CHECK (id = 1), source_path TEXT, source_size INTEGER, "
+            "source_mtime_ns INTEGER, indexed_rows INTEGER, index_complete INTEGER, "
+            "source_rows INTEGER, target_offset INTEGER, rows_written INTEGER, duplicates INTEGER, "
+            "invalid INTEGER)"
+        )
+        self._connection.execute("BEGIN")
+
+
+    def load_checkpoint(self):
+        """
+        Return the last committed checkpoint.
+
+        :return: Dictionary with the checkpoint_fields, or None for a new conversion.
+        """
+        row = self._connection.execute(
+            f"SELECT {', '.join(self.checkpoint_fields)} FROM checkpoint"
+        ).fetchone()
+        if row is None:
+            return None
+        return dict(zip(self.checkpoint_fields, row))
+
+
+    def index_movies(self, movies):
+        """
+        Record the movies of a chunk of the first pass, so the second pass
+        can tell which rows are duplicates.
+
+        :param movies: List of (source_row, movie_id, details) tuples, the
+                       source row numbers starting at 0.
+        """
+        self._connection.executemany(
+            "INSERT OR REPLACE INTO last_rows (id_hash, source_row) VALUES (?, ?)",
+            [(hash_movie_id(movie_id), source_row) for source_row, movie_id, details in movies]
+        )
+        self._connection.executemany(
+            "INSERT OR IGNORE INTO imdb_local_ids (id_hash) VALUES (?)",
+            [(hash_movie_id(make_local_id(details)),) for source_row, movie_id, details in movies
+             if details.get("imdb_id")]
+        )
+
+
+    def kept_rows(self, movies):
+        """
+        Apply the rule of deduplicate_movies() to a chunk of the second pass:
+        only the last row of a movie id is kept, and a movie without imdbID
+        is dropped if a movie with an imdbID has the same title and year.
+
+        :param movies: List of (source_row, movie_id, details) tuples.
+        :return: Set of the source rows to write to the target.
+        """
+        id_hashes = [hash_movie_id(movie_id) for source_row, movie_id, details in movies]
+        last_rows = dict(self._select_hashes("SELECT id_hash, source_row FROM last_rows", id_hashes))
+        imdb_local_ids = {
+            id_hash for id_hash, in self._select_hashes("SELECT id_hash FROM imdb_local_ids", id_hashes)
+        }
+        return {
+            source_row for (source_row, movie_id, details), id_hash in zip(movies, id_hashes)
+            if last_rows.get(id_hash) == source_row
+            and (details.get("imdb_id") or id_hash not in imdb_local_ids)
+        }
+
+
+    def _select_hashes(self, query, id_hashes):
+        """
+        Run a query for the given id hashes, in batches below the SQLite parameter limit.
+
+        :param query: SELECT statement without WHERE clause.
+        :param id_hashes: List of id hashes.
+        :return: Iterator of result rows.
+        """
+        for start in range(0, len(id_hashes), SQLITE_BATCH_SIZE):
+            batch = id_hashes[start:start + SQLITE_BATCH_SIZE]
+            yield from self._connection.execute(
+                f"{query} WHERE id_hash IN ({', '.join('?' * len(batch))})", batch
+            )
+
+
+    def commit(self, checkpoint):
+        """
+        Atomically store the index entries of the current chunk together with the new checkpoint.
+
+        :param checkpoint: Dictionary as returned by load_checkpoint().
+        """
+        self._connection.execute(
+            f"INSERT OR REPLACE INTO checkpoint (id, {', '.join(self.checkpoint_fields)}) "
+            f"VALUES (1, {', '.join('?' * len(self.checkpoint_fields))})",
+            [checkpoint[field] for field in self.checkpoint_fields]
+        )
+        self._connection.execute("COMMIT")
+        self._connection.execute("BEGIN")
+
+
+    def close(self):
+        """
+        Discard uncommitted changes and close the state file.
+        """
+        self._connection.execute("ROLLBACK")
+        self._connection.close()
+
+
+def hash_movie_id(movie_id):
+    """
+    Hash a movie id to a fixed-size key for the state file.
+
+    :param movie_id: Id of the movie.
+    :return: 16-byte digest.
+    """
+    return hashlib.blake2b(movie_id.encode("utf-8"), digest_size=16).digest()
+
+
+def iter_source_rows(source):
+    """
+    Iterate over the raw rows of a source in a single pass. A storage is
+    read through IStorage.iter_movies(), which holds one movie at a time,
+    so a storage is converted in constant memory like a file path.
+
+    :param source: Path to a .csv or .json movie file, or an IStorage instance.
+    :return: Iterator of row dictionaries.
+    """
+    if isinstance(source, IStorage):
+        return (details for movie_id, details in source.iter_movies())
+    return iter_file_rows(source)
+
+
+def source_fingerprint(source):
+    """
+    Identify the version of a source file, so a conversion is only resumed
+    from the same data it started with.
+
+    :param source: Path to a .csv or .json movie file, or an IStorage instance.
+    :return: Dictionary with source_path, source_size and source_mtime_ns, all
+             None if the source is a storage without file_path.
+    """
+    file_path = source if isinstance(source, str) else getattr(source, "file_path", None)
+    if file_path is None:
+        return dict.fromkeys(MigrationState.source_fields)
+    stat_result = os.stat(file_path)
+    return {"source_path": os.path.abspath(file_path), "source_size": stat_result.st_size,
+            "source_mtime_ns": stat_result.st_mtime_ns}
+
+
+def check_source(source, fingerprint):
+    """
+    Make sure the source did not change during the conversion.
+
+    :param source: Path to a .csv or .json movie file, or an IStorage instance.
+    :param fingerprint: Fingerprint of the source taken at the start, see source_fingerprint().
+    :raises ValueError: If the source changed.
+    """
+    if source_fingerprint(source) != fingerprint:
+        raise ValueError("The source changed during the conversion; use --restart to start over")
+
+
+def iter_chunks(rows, chunk_size):
+    """
+    Split an iterator of rows into lists of at most chunk_size rows.
+
+    :param rows: Iterator of rows.
+    :param chunk_size: Maximum number of rows per chunk.
+    :return: Iterator of lists of rows.
+    """
+    while True:
+        chunk = list(itertools.islice(rows, chunk_size))
+        if not chunk:
+            return
+        yield chunk
+
+
+def parse_chunk(chunk, first_row):
+    """
+    Validate the rows of a chunk, skipping invalid rows.
+
+    :param chunk: List of raw row dictionaries.
+    :param first_row: Number of the first row of the chunk in the source.
+    :return: List of (source_row, movie_id, details) tuples.
+    """
+    movies = []
+    for source_row, row in enumerate(chunk, start=first_row):
+        try:
+            movie_id, details = parse_movie_row(row)
+        except ValueError:
+            continue
+        movies.append((source_row, movie_id, details))
+    return movies
+
+
+def convert(source, target_path, chunk_size=DEFAULT_CHUNK_SIZE, state_path=None, restart=False):
+    """
+    Stream movies from a source into a new .csv or .json target file.
+    Rows are validated, duplicates are dropped and the target is written
+    chunk by chunk. Duplicates are removed with the rule of
+    deduplicate_movies(), so the target holds the movies the app shows:
+    of several rows with the same movie id the last one is kept, and a
+    movie without imdbID is dropped if a movie with an imdbID has the same
+    normalized title and year. To apply it in constant memory the source
+    is read twice: the first pass indexes the rows on disk, the second
+    one writes the target. After every chunk the progress is
+    checkpointed, so calling convert() again after an interruption
+    resumes where the last chunk ended. Rows are skipped by position when
+    resuming, so the checkpoint records the path, size and modification
+    time of the source, and a source that no longer matches is not resumed.
+
+    :param source: Path to a .csv or .json movie file, or an IStorage instance.
+    :param target_path: Path to the .csv or .json file to write.
+    :param chunk_size: Number of source rows per chunk.
+    :param state_path: Path to the state file, defaults to the target path with '.migrate' appended.
+    :param restart: Ignore an existing state file and start from the beginning.
+    :return: Dictionary with the final counters.
+    :raises ValueError: If the source is not the one of the interrupted
+                        conversion or changed; pass restart=True to start over.
+    """
+    state_path = state_path or f"{target_path}.migrate"
+    if restart and os.path.exists(state_path):
+        os.remove(state_path)
+
+    state = MigrationState(state_path)
+    checkpoint = state.load_checkpoint()
+    fingerprint = source_fingerprint(source)
+    if checkpoint is None:
+        checkpoint = {field: 0 for field in MigrationState.checkpoint_fields}
+        checkpoint.update(fingerprint)
+    elif fingerprint["source_path"] is None or any(
+            checkpoint[field] != fingerprint[field] for field in MigrationState.source_fields):
+        # Without a file the source cannot be compared, so it is never resumed
+        state.close()
+        raise ValueError(f"The source is not the one the interrupted conversion to {target_path} "
+                         f"was reading, or it changed since; use --restart to start over")
+    elif checkpoint["index_complete"]:
+        print(f"Resuming after {checkpoint['source_rows']} source rows")
+    else:
+        print(f"Resuming the duplicate index after {checkpoint['indexed_rows']} source rows")
+
+    try:
+        start_time = time.monotonic()
+        start_rows = checkpoint["indexed_rows"]
+        rows = itertools.islice(iter_source_rows(source), checkpoint["indexed_rows"], None)
+        for chunk in ([] if checkpoint["index_complete"] else iter_chunks(rows, chunk_size)):
+            state.index_movies(parse_chunk(chunk, checkpoint["indexed_rows"]))
+            checkpoint["indexed_rows"] += len(chunk)
+            check_source(source, fingerprint)
+            state.commit(checkpoint)
+
+            elapsed = time.monotonic() - start_time
+            rows_per_second = (checkpoint["indexed_rows"] - start_rows) / elapsed if elapsed else 0
+            print(f"{checkpoint['indexed_rows']} rows indexed ({rows_per_second:.0f} rows/s)")
+        checkpoint["index_complete"] = 1
+        state.commit(checkpoint)
+
+        writer = create_movie_writer(target_path, checkpoint["target_offset"], checkpoint["rows_written"])
+        start_time = time.monotonic()
+        start_rows = checkpoint["source_rows"]
+        rows = itertools.islice(iter_source_rows(source), checkpoint["source_rows"], None)
+        for chunk in iter_chunks(rows, chunk_size):
+            movies = parse_chunk(chunk, checkpoint["source_rows"])
+            kept_rows = state.kept_rows(movies)
+            for source_row, movie_id, details in movies:
+                if source_row in kept_rows:
+                    writer.write(details)
+                else:
+                    checkpoint["duplicates"] += 1
+            checkpoint["invalid"] += len(chunk) - len(movies)
+
+            checkpoint["source_rows"] += len(chunk)
+            checkpoint["rows_written"] = writer.rows_written
+            checkpoint["target_offset"] = writer.flush()
+            check_source(source, fingerprint)
+            state.commit(checkpoint)
+
+            elapsed = time.monotonic() - start_time
+            rows_per_second = (checkpoint["source_rows"] - start_rows) / elapsed if elapsed else 0
+            print(f"{checkpoint['source_rows']} rows read, {checkpoint['rows_written']} written, "
+                  f"{checkpoint['duplicates']} duplicates, {checkpoint['invalid']} invalid "
+                  f"({rows_per_second:.0f} rows/s)")
+    except BaseException:
+        # Leave the state file behind so the conversion can be resumed
+        state.close()
+        raise
+
+    writer.close()
+    state.close()
+    os.remove(state_path)
+    return checkpoint
+
+
+def main():
+    """
+    Parse the command line arguments and run the conversion.
+    """
+    parser = argparse.ArgumentParser(description="Convert a movie catalog between CSV and JSON.")
+    parser.add_argument("source", help="Path to the .csv or .json file to read")
+    parser.add_argument("target", help="Path to the .csv or .json file to write")
+    parser.add_argument("--chunk-size", type=int, default=DEFAULT_CHUNK_SIZE)
+    parser.add_argument("--state", default=None, help="Path to the resume state file")
+    parser.add_argument("--restart", action="store_true", help="Ignore an interrupted conversion")
+    args = parser.parse_args()
+
+    try:
+        counters = convert(args.source, args.target, args.chunk_size, args.state, args.restart)
+    except ValueError as e:
+        sys.exit(f"Error: {e}")
+    print(f"Converted {counters['rows_written']} movies to {os.path.abspath(args.target)}")
+
+
+if __name__ == "__main__":
+    main()
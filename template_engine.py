@@ -0,0 +1,127 @@
+import html
+import os
+import re
+
+from storage.atomic_file import atomic_write
+
+
+PLACEHOLDER_PATTERN = re.compile(r"__TEMPLATE_([A-Z0-9_]+?)__")
+WRITE_BUFFER_SIZE = 64 * 1024
+
+# Compiled templates by path, with the modification time they were compiled at
+_template_cache = {}
+
+
+class CompiledTemplate:
+    """
+    A template split once into literal text and __TEMPLATE_NAME__ placeholders,
+    so it can be rendered many times without searching the text again.
+    """
+
+    def __init__(self, text):
+        """
+        Parse the template text.
+
+        :param text: Template text containing __TEMPLATE_NAME__ placeholders.
+        """
+        self.segments = []
+        position = 0
+        for match in PLACEHOLDER_PATTERN.finditer(text):
+            if match.start() > position:
+                self.segments.append((False, text[position:match.start()]))
+            self.segments.append((True, match.group(1)))
+            position = match.end()
+        if position < len(text):
+            self.segments.append((False, text[position:]))
+        self.placeholders = {name for is_placeholder, name in self.segments if is_placeholder}
+
+
+    def render(self, output_file, context):
+        """
+        Write the template to an open file, chunk by chunk.
+
+        A string value is HTML-escaped. Any other value must be an iterable
+        of markup chunks, e.g. a generator, which is written as it is
+        produced, so the full output is never held in memory.
+
+        :param output_file: File object opened for writing text.
+        :param context: Dictionary mapping placeholder names (without the
+                        __TEMPLATE_ prefix) to strings or iterables of markup.
+        :raises KeyError: If the context has no value for a placeholder.
+        """
+        missing = self.placeholders - context.keys()
+        if missing:
+            raise KeyError(f"No value for template placeholder(s): {', '.join(sorted(missing))}")
+
+        for is_placeholder, value in self.segments:
+            if not is_placeholder:
+                output_file.write(value)
+                continue
+            context_value = context[value]
+            if isinstance(context_value, str):
+                output_file.write(html.escape(context_value))
+            else:
+                for chunk in context_value:
+                    output_file.write(chunk)
+
+
+    def render_to_path(self, output_path, context):
+        """
+        Render the template into a file. The output is written to a
+        temporary file first, so the previous file stays intact until the
+        new one is complete. If rendering fails, e.g. because a generator in
+        the context raises, the temporary file is removed and the error is
+        raised again.
+
+        :param output_path: Path of the file to write.
+        :param context: See render().
+        """
+        with atomic_write(output_path, "w", encoding="utf-8", buffering=WRITE_BUFFER_SIZE) as output_file:
+            self.render(output_file, context)
+
+
+def load_template(template_path):
+    """
+    Return the compiled template for a file, compiling it only if it is
+    not cached yet or has changed since it was compiled.
+
+    :param template_path: Path to the template file.
+    :return: CompiledTemplate.
+    """
+    modification_time = os.stat(template_path).st_mtime_ns
+    cached = _template_cache.get(template_path)
+    if cached is not None and cached[0] == modification_time:
+        return cached[1]
+
+    with open(template_path, "r", encoding="utf-8") as template_file:
+        template = CompiledTemplate(template_file.read())
+    _template_cache[template_path] = (modification_time, template)
+    return template
+
+
+def render_movie_item(details):
+    """
+    Render one movie of the movie grid, with all values HTML-escaped.
+
+    :param details: Movie details as returned by IStorage.list_movies().
+    :return: Markup for the movie.
+    """
+    title = html.escape(str(details["title"]))
+    return f"""
+            <div class="movie-item">
+                <h2>{title} ({html.escape(str(details['year']))})</h2>
+                <p>Rating: {html.escape(str(details['rating']))}</p>
+                <img src="{html.escape(details.get('poster', ''))}" alt="Poster for {title}">
+            </div>
+            """
+
+
+def iter_movie_grid(movie_items):
+    """
+    Render the movie grid one movie at a time.
+
+    :param movie_items: Iterable of (movie_id, details) tuples, e.g. IStorage.iter_movies().
+    :return: Iterator of markup chunks.
+    """
+    for movie_id, details in movie_items:
+        yield render_movie_item(details)
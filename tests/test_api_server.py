@@ -0,0 +1,53 @@
+import http.client
+import threading
+
+import pytest
+
+from api_server import create_server
+from storage.storage_json import StorageJson
+
+
+@pytest.fixture
+def server(tmp_path):
+    file_path = str(tmp_path / "movies.json")
+    storage = StorageJson(file_path)
+    storage.add_movie("Fight Club", 1999, 8.8, "", "tt0137523")
+    storage.add_movie("Amélie", 2001, 8.3, "")
+    server = create_server(file_path, port=0)
+    thread = threading.Thread(target=server.serve_forever, daemon=True)
+    thread.start()
+    yield server
+    server.shutdown()
+    server.server_close()
+
+
+def get(server, path, headers=None):
+    connection = http.client.HTTPConnection(*server.server_address, timeout=5)
+    try:
+        connection.request("GET", path, headers=headers or {})
+        response = connection.getresponse()
+        return response.status, response.getheader("ETag"), response.read()
+    finally:
+        connection.close()
+
+
+def test_matching_etag_gets_not_modified(server):
+    status, etag, body = get(server, "/movies/filter?min_rating=8.5")
+    assert status == 200
+    assert etag
+
+    status, not_modified_etag, body = get(server, "/movies/filter?min_rating=8.5", {"If-None-Match": etag})
+    assert status == 304
+    assert not_modified_etag == etag
+    assert body == b""
+
+
+def test_invalid_parameter_wins_over_matching_etag(server):
+    status, etag, body = get(server, "/movies")
+
+    status, _, body = get(server, "/movies/filter?min_rating=abc", {"If-None-Match": etag})
+    assert status == 400
+    assert b"min_rating" in body
+
+    status, _, body = get(server, "/movies/filter?start_year=1999", {"If-None-Match": "*"})
+    assert status == 304
@@ -0,0 +1,36 @@
+from storage import change_feed
+from storage.change_feed import EVENT_ADDED, ChangeFeed
+
+
+def added_event(title):
+    return {"type": EVENT_ADDED, "movie_id": title, "movie": {"title": title}}
+
+
+def test_append_after_truncated_last_line(tmp_path):
+    feed = ChangeFeed(str(tmp_path / "movies.json.changes.jsonl"))
+    feed.append([added_event("Fight Club"), added_event("Amélie")])
+    # A writer crashed in the middle of its line
+    with open(feed.log_path, "ab") as log_file:
+        log_file.write(b'{"seq": 3, "time": 1.0, "type": "add')
+    assert feed.last_sequence() == 2
+
+    written = feed.append([added_event("Heat")])
+
+    assert [event["seq"] for event in written] == [3]
+    events = [event for event, position in feed.read_since()]
+    assert [event["seq"] for event in events] == [1, 2, 3]
+    assert events[-1]["movie_id"] == "Heat"
+    assert feed.last_sequence() == 3
+
+
+def test_append_finds_last_line_across_tail_blocks(tmp_path, monkeypatch):
+    monkeypatch.setattr(change_feed, "TAIL_BLOCK_SIZE", 16)
+    feed = ChangeFeed(str(tmp_path / "movies.json.changes.jsonl"))
+    feed.append([added_event("Fight Club")])
+    with open(feed.log_path, "ab") as log_file:
+        log_file.write(b'{"seq": 2, "time": 1.0, "type": "added", "movie_id": "unfinished')
+
+    written = feed.append([added_event("Heat"), added_event("Ran")])
+
+    assert [event["seq"] for event in written] == [2, 3]
+    assert [event["seq"] for event, position in feed.read_since(1)] == [2, 3]
@@ -0,0 +1,86 @@
+import csv
+import os
+
+import pytest
+
+import storage_converter
+from storage_converter import convert
+
+
+def write_source(file_path, rows):
+    with open(file_path, "w", newline='') as csv_file:
+        writer = csv.DictWriter(csv_file, fieldnames=["title", "year", "rating", "poster", "imdb_id"])
+        writer.writeheader()
+        writer.writerows(rows)
+
+
+def make_rows(count):
+    rows = []
+    for number in range(count):
+        rows.append({"title": f"Movie {number % 15}", "year": 2000 + number % 15, "rating": number % 10,
+                     "poster": "", "imdb_id": f"tt{number % 15:07d}" if number % 4 == 0 else ""})
+    rows.insert(7, {"title": "", "year": 2000, "rating": 5, "poster": "", "imdb_id": ""})
+    return rows
+
+
+def interrupt_after(monkeypatch, source_pass, row_count):
+    """
+    Make the given pass over the source (1 or 2) raise KeyboardInterrupt
+    after row_count rows.
+    """
+    iter_source_rows = storage_converter.iter_source_rows
+    passes = []
+
+    def interrupted_rows(source):
+        passes.append(source)
+        for number, row in enumerate(iter_source_rows(source)):
+            if len(passes) == source_pass and number == row_count:
+                raise KeyboardInterrupt
+            yield row
+
+    monkeypatch.setattr(storage_converter, "iter_source_rows", interrupted_rows)
+
+
+@pytest.fixture
+def source_path(tmp_path):
+    file_path = str(tmp_path / "movies.csv")
+    write_source(file_path, make_rows(60))
+    return file_path
+
+
+@pytest.mark.parametrize("source_pass", [1, 2])
+@pytest.mark.parametrize("target_name", ["movies.json", "movies_copy.csv"])
+def test_convert_resumes_after_interrupted_chunk(tmp_path, monkeypatch, source_path, source_pass, target_name):
+    target_path = str(tmp_path / target_name)
+    expected_path = str(tmp_path / f"expected_{target_name}")
+    expected_counters = convert(source_path, expected_path, chunk_size=8)
+
+    with monkeypatch.context() as patch:
+        # Row 29 lies in the middle of the fourth chunk
+        interrupt_after(patch, source_pass, 29)
+        with pytest.raises(KeyboardInterrupt):
+            convert(source_path, target_path, chunk_size=8)
+    assert os.path.exists(f"{target_path}.migrate")
+
+    counters = convert(source_path, target_path, chunk_size=8)
+
+    with open(target_path) as target_file, open(expected_path) as expected_file:
+        assert target_file.read() == expected_file.read()
+    for field in ("rows_written", "duplicates", "invalid"):
+        assert counters[field] == expected_counters[field]
+    assert not os.path.exists(f"{target_path}.migrate")
+
+
+def test_convert_refuses_to_resume_from_changed_source(tmp_path, monkeypatch, source_path):
+    target_path = str(tmp_path / "movies.json")
+    with monkeypatch.context() as patch:
+        interrupt_after(patch, 2, 29)
+        with pytest.raises(KeyboardInterrupt):
+            convert(source_path, target_path, chunk_size=8)
+    write_source(source_path, make_rows(61))
+
+    with pytest.raises(ValueError, match="--restart"):
+        convert(source_path, target_path, chunk_size=8)
+
+    counters = convert(source_path, target_path, chunk_size=8, restart=True)
+    assert counters["source_rows"] == 62
@@ -0,0 +1,46 @@
+import json
+
+import pytest
+
+from storage import streaming
+from storage.streaming import iter_json_rows
+
+
+MOVIES = [
+    {"title": "Fight Club", "year": 1999, "rating": 8.8, "poster": "", "imdb_id": "tt0137523"},
+    {"title": "Amélie", "year": 2001, "rating": 8.3, "poster": "", "imdb_id": ""},
+    {"title": "Spirited Away, [Sen]", "year": 2001, "rating": 8.6, "poster": "", "imdb_id": ""},
+]
+
+
+def test_iter_json_rows_reads_array_split_across_blocks(tmp_path, monkeypatch):
+    file_path = tmp_path / "movies.json"
+    file_path.write_text(json.dumps(MOVIES, indent=4))
+    # Small blocks split the array inside items, strings and separators
+    monkeypatch.setattr(streaming, "READ_BLOCK_SIZE", 7)
+
+    assert list(iter_json_rows(str(file_path))) == MOVIES
+
+
+def test_iter_json_rows_reads_empty_array(tmp_path):
+    file_path = tmp_path / "movies.json"
+    file_path.write_text("  [ ]\n")
+
+    assert list(iter_json_rows(str(file_path))) == []
+
+
+def test_iter_json_rows_rejects_incomplete_array(tmp_path, monkeypatch):
+    file_path = tmp_path / "movies.json"
+    file_path.write_text(json.dumps(MOVIES, indent=4)[:-40])
+    monkeypatch.setattr(streaming, "READ_BLOCK_SIZE", 16)
+
+    with pytest.raises(ValueError, match="incomplete JSON array"):
+        list(iter_json_rows(str(file_path)))
+
+
+def test_iter_json_rows_rejects_non_array(tmp_path):
+    file_path = tmp_path / "movies.json"
+    file_path.write_text(json.dumps({"title": "Fight Club"}))
+
+    with pytest.raises(ValueError, match="does not contain a JSON array"):
+        list(iter_json_rows(str(file_path)))